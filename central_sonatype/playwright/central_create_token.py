@@ -1,9 +1,15 @@
 import sys
+from urllib.parse import urlparse
+
 import common
-import pyperclip
+from ciadmin import capture, cli, launcher, passstore, probes, tracing
 from playwright.sync_api import sync_playwright, expect
 
+# request of the user token page that creates the token
+USER_TOKEN_API = "/api/v1/usertoken"
+
 
+@tracing.traced
 def setup_token(page, project_name):
     common.nav_to_token_settings(page)
 
@@ -20,12 +26,15 @@ def setup_token(page, project_name):
     page.get_by_label("Token Name").fill(token_name)
 
     page.get_by_text("Does not expire", exact=True).click()
-    page.locator("[data-test=\"add-token-submit\"]").click()
+    copy_username = page.get_by_label("Copy Username", exact=True)
+    copy_password = page.get_by_label("Copy Password")
+    # the token is returned by the request that creates it as nameCode/passCode
+    with capture.JsonResponses(page, lambda url: urlparse(url).path.endswith(USER_TOKEN_API)) as responses:
+        page.locator("[data-test=\"add-token-submit\"]").click()
+        copy_username.wait_for()
 
-    page.get_by_label("Copy Username", exact=True).click()
-    token_username = pyperclip.paste()
-    page.get_by_label("Copy Password").click()
-    token_password = pyperclip.paste()
+    token_username = responses.find("nameCode") or capture.copied(copy_username)
+    token_password = responses.find("passCode") or capture.copied(copy_password)
 
     print("Central token name: " + token_username)
     print("Central token pw: " + token_password)
@@ -40,39 +49,52 @@ def setup_token(page, project_name):
     page.locator("[data-test=\"close-view-token-modal\"]").click()
 
 
-def main():
-    _DEFAULT_TIMEOUT = 10000
+_DEFAULT_TIMEOUT = 10000
 
-    if len(sys.argv) < 2:
-        print("ERROR: project name must be set")
-        sys.exit(1)
-    else:
-        project_name = sys.argv[1]
-        print("Project name: " + project_name)
 
-    print("opening browser window")
-    with sync_playwright() as playwright:
-        browser = playwright.firefox.launch(headless=False)
-        context = browser.new_context(no_viewport=True)
+def token_is_set_up(project_name):
+    # the user token is in pass and accepted by the publisher API
+    if not probes.enabled or not probes.in_pass(common.driver, project_name, "token-username", "token-password"):
+        return False
+    return probes.skip("Central token", probes.central_token_valid(
+        probes.stored(common.driver, project_name, "token-username"),
+        probes.stored(common.driver, project_name, "token-password")))
+
+
+@tracing.traced
+def run(browser, project_name, fast):
+    context = common.driver.new_context(browser, fast)
 
-        page = context.new_page()
-        page.set_default_timeout(_DEFAULT_TIMEOUT)
+    page = context.new_page()
+    page.set_default_timeout(_DEFAULT_TIMEOUT)
 
-        username = common.get_pass_creds(project_name, "username")
-        password = common.get_pass_creds(project_name, "password")
+    username = common.get_pass_creds(project_name, "username")
+    password = common.get_pass_creds(project_name, "password")
 
-        common.login(page, project_name, username, password)
+    common.login(page, project_name, username, password)
 
-        expect(page.get_by_role("link", name="Home", exact=True)).to_be_visible(timeout=30000)
+    expect(page.get_by_role("link", name="Home", exact=True)).to_be_visible(timeout=30000)
 
+    # the secrets of the token are written (and committed) together once the token is set up
+    with passstore.batch():
         setup_token(page, project_name)
 
-        # input('Press any key to continue\n')
-        common.signout(page)
+    # input('Press any key to continue\n')
+    common.signout(page)
 
-        page.close()
-        context.close()
-        browser.close()
+    page.close()
+    context.close()
+
+
+def main():
+    project_name, fast = cli.parse_project_args()
+
+    if token_is_set_up(project_name):
+        return
+
+    print("opening browser window")
+    with sync_playwright() as playwright:
+        launcher.run(playwright, lambda browser, fast: run(browser, project_name, fast), fast)
 
 
 if __name__ == "__main__":
@@ -1,25 +1,162 @@
-import sys
+import re
+from concurrent.futures import ThreadPoolExecutor
+
 import common
+from ciadmin import cli, launcher, probes, tracing, waits
 from playwright.sync_api import sync_playwright, expect
 
-
+# SNAPSHOTs are enabled through the backend endpoints of the portal, with the cookies of the logged in browser
+# context and one request per namespace, all namespaces of a project at the same time. If the endpoints answer
+# with anything unexpected (or a namespace cannot be enabled), the namespaces page is used instead.
+
+PORTAL_URL = "https://" + common.AUTH_SITE
+NAMESPACES_API = "/api/internal/publisher/namespaces"
+# added to every API request (e.g. by the offline benchmark)
+API_HEADERS = {}
+
+_DEFAULT_TIMEOUT = 10000
+_API_TIMEOUT = 15
+_API_JOBS = 8
+
+# per-project results, also used by the batch summary
+ACTIVATED = "activated"
+ALREADY_ENABLED = "already enabled"
+NO_PUBLISHER = "no publisher"
+NO_NAMESPACE = "no namespace"
+LOGIN_FAILED = "login failed"
+FAILED = "failed"
+
+# the portal API has no SNAPSHOT state of the namespaces, the last UI result is remembered instead (only trusted
+# with playwright/probe-ttl, a namespace added since then would be missed)
+PROBE = "central-snapshots"
+
+
+def needs_check(project_name):
+    return not probes.skip(project_name + " SNAPSHOTs", probes.recall(PROBE, project_name) == ALREADY_ENABLED)
+
+
+class PortalApi:
+    def __init__(self, context, jobs=_API_JOBS):
+        import requests
+        from requests.adapters import HTTPAdapter, Retry
+        self.session = requests.Session()
+        retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504], allowed_methods=None)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=jobs, max_retries=retries)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept": "application/json"})
+        self.session.headers.update(API_HEADERS)
+        # the authenticated session of the browser context
+        for cookie in context.cookies(PORTAL_URL):
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"])
+            if cookie["name"] == "XSRF-TOKEN":
+                self.session.headers["X-XSRF-TOKEN"] = cookie["value"]
+
+    def _call(self, method, path):
+        # decoded JSON answer, None if the request failed or the answer is not JSON
+        import requests
+        try:
+            with tracing.external("central api"):
+                response = self.session.request(method, PORTAL_URL + path, timeout=_API_TIMEOUT, allow_redirects=False)
+        except requests.RequestException as e:
+            print(f"Central API request failed ({e})")
+            return None
+        if response.status_code != 200 or "json" not in response.headers.get("Content-Type", ""):
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    def namespaces(self):
+        # namespace -> SNAPSHOTs enabled, None if the list is not available
+        data = self._call("GET", NAMESPACES_API)
+        if isinstance(data, dict):
+            data = data.get("namespaces", data.get("content"))
+        if not isinstance(data, list):
+            return None
+        namespaces = {}
+        for item in data:
+            name = (item.get("name") or item.get("namespace")) if isinstance(item, dict) else None
+            if not name:
+                return None
+            namespaces[name] = bool(item.get("snapshotsEnabled", item.get("snapshotEnabled", False)))
+        return namespaces
+
+    def enable_snapshots(self, namespace):
+        data = self._call("POST", f"{NAMESPACES_API}/{namespace}/snapshots/enable")
+        return isinstance(data, dict) and bool(data.get("snapshotsEnabled", data.get("snapshotEnabled", False)))
+
+
+@tracing.traced
+def check_api(page, project_name):
+    # (result, number of namespaces enabled), the result is None if the UI has to be used
+    api = PortalApi(page.context)
+    namespaces = api.namespaces()
+    if namespaces is None:
+        print(f"{project_name}: Central API not available, using the namespaces page")
+        return None, 0
+    if not namespaces:
+        print(f"{project_name}: No namespace found")
+        return NO_NAMESPACE, 0
+
+    print(f"{project_name}: Found {len(namespaces)} namespace(s)")
+    todo = [namespace for namespace, enabled in namespaces.items() if not enabled]
+    for namespace in namespaces:
+        if namespace not in todo:
+            print(f"namespace {namespace} : snapshot already activated. Skip.")
+    if not todo:
+        return ALREADY_ENABLED, 0
+
+    with ThreadPoolExecutor(max_workers=min(_API_JOBS, len(todo))) as executor:
+        list(executor.map(api.enable_snapshots, todo))
+
+    # only the state listed by the portal counts, not the answers to the enable requests
+    namespaces = api.namespaces()
+    if namespaces is None:
+        print(f"{project_name}: unable to verify the namespaces, using the namespaces page")
+        return None, 0
+    for namespace in todo:
+        print(f"{project_name}: Activate snapshot for namespace {namespace}: {'done' if namespaces.get(namespace) else 'failed'}")
+    activated = sum(1 for namespace in todo if namespaces.get(namespace))
+    if activated < len(todo):
+        # the namespaces page skips the namespaces that are enabled already
+        return None, activated
+    return ACTIVATED, activated
+
+
+@tracing.traced
 def check(page, project_name):
+    result, activated = check_api(page, project_name)
+    if result is None:
+        result = check_ui(page, project_name)
+        if result == ALREADY_ENABLED and activated:
+            result = ACTIVATED
+    return result
+
+
+@tracing.traced
+def check_ui(page, project_name):
     page.get_by_role('link', name='Publish').wait_for()
 
     try:
         page.get_by_role('link', name='Publish').click()
     except:
         print(f"{project_name}: No publisher ⚠️")
-        return
+        return NO_PUBLISHER
 
     page.locator('[data-test="namespace-tab"]').click()
-    page.wait_for_timeout(2000)
-
     namespace_items = page.locator("[data-test=\"namespace-item\"]")
+    # the list is rendered after the click, an empty list shows a message instead
+    no_namespace = page.get_by_text(re.compile("no namespaces", re.IGNORECASE))
+    waits.for_any([namespace_items, no_namespace], budget=5000, name="namespaces loaded")
+
     item_count = namespace_items.count()
 
     if item_count > 0:
         print(f"{project_name}: Found {item_count} namespace(s)")
+        activated = 0
+        failed = 0
 
         for i in range(item_count):
             try:
@@ -36,52 +173,66 @@ def check(page, project_name):
                 more_actions_button = namespace_item.get_by_role("button", name="More Actions...")
                 more_actions_button.click()
                 page.locator("[data-test=\"enable-snapshot-btn\"]").click()
-                page.locator("[data-test=\"confirm-btn\"]").click()
+                confirm_button = page.locator("[data-test=\"confirm-btn\"]")
+                confirm_button.click()
+                waits.for_locator(confirm_button, budget=2000, state="hidden", name="snapshot confirmed")
                 page.keyboard.press("Escape")
-                page.wait_for_timeout(1000)
+                activated += 1
 
             except Exception as e:
                 print(f"{project_name}: Snapshot Failed! ({e})")
+                failed += 1
 
-    else:
-        print(f"{project_name}: No namespace found")
-
+        if failed > 0:
+            return FAILED
+        if activated > 0:
+            return ACTIVATED
+        return ALREADY_ENABLED
 
-def main():
-    _DEFAULT_TIMEOUT = 10000
-
-    if len(sys.argv) < 2:
-        print("ERROR: project name must be set")
-        sys.exit(1)
     else:
-        project_name = sys.argv[1]
-        print("Project name: " + project_name)
+        print(f"{project_name}: No namespace found")
+        return NO_NAMESPACE
 
-    print("opening browser window")
-    with sync_playwright() as playwright:
-        browser = playwright.firefox.launch(headless=False)
-        context = browser.new_context(no_viewport=True)
 
+@tracing.traced
+def snapshot_project(browser, project_name, fast=False):
+    # every project gets its own isolated context, so several projects can share one browser
+    context = common.driver.new_context(browser, fast)
+    try:
         page = context.new_page()
         page.set_default_timeout(_DEFAULT_TIMEOUT)
 
         username = common.get_pass_creds(project_name, "username")
         password = common.get_pass_creds(project_name, "password")
 
-        common.login(page, project_name, username, password)
-
-        try:        
+        try:
+            common.login(page, project_name, username, password)
             expect(page.get_by_role("link", name="Home", exact=True)).to_be_visible(timeout=2000)
-        except:
+        except Exception:
             print(project_name + ": Login failed ❌")
-            return
-        check(page, project_name)
+            return LOGIN_FAILED
 
-        common.signout(page)
+        result = check(page, project_name)
+        if result in (ACTIVATED, ALREADY_ENABLED):
+            probes.remember(PROBE, project_name, ALREADY_ENABLED)
 
+        common.signout(page)
         page.close()
+        return result
+    finally:
         context.close()
-        browser.close()
+
+
+def main():
+    project_name, fast = cli.parse_project_args()
+
+    if not needs_check(project_name):
+        return
+
+    print("opening browser window")
+    with sync_playwright() as playwright:
+        launcher.run(playwright, lambda browser, fast: snapshot_project(browser, project_name, fast), fast)
+    waits.report()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,124 @@
+import argparse
+import multiprocessing
+import queue
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import central_namespace_snapshot as snapshot
+from ciadmin import launcher
+from playwright.sync_api import sync_playwright
+
+_DEFAULT_JOBS = 4
+
+
+def read_projects(projects_file):
+    if projects_file == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(projects_file, 'r') as f:
+            lines = f.read().splitlines()
+
+    projects = []
+    for line in lines:
+        line = line.strip()
+        # allow comments and empty lines in project lists
+        if line and not line.startswith("#") and line not in projects:
+            projects.append(line)
+    return projects
+
+
+def worker(project_queue, result_queue, fast):
+    # one browser per worker, one fresh context per project, every result is put as soon as it is known so that it
+    # is kept if the worker fails later
+    with sync_playwright() as playwright:
+        browser = launcher.launch(playwright, fast)
+        try:
+            while True:
+                try:
+                    project_name = project_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                try:
+                    result = snapshot.snapshot_project(browser, project_name, fast)
+                except Exception as e:
+                    print(f"{project_name}: Unexpected error ({e})")
+                    result = snapshot.FAILED
+                result_queue.put((project_name, result))
+        finally:
+            browser.close()
+
+
+def print_summary(results):
+    print("")
+    print("===== Summary =====")
+    width = max(len(project_name) for project_name, _ in results)
+    for project_name, result in sorted(results):
+        print(f"{project_name.ljust(width)}  {result}")
+
+    print("")
+    counts = {}
+    for _, result in results:
+        counts[result] = counts.get(result, 0) + 1
+    for result in [snapshot.ACTIVATED, snapshot.ALREADY_ENABLED, snapshot.NO_NAMESPACE,
+                   snapshot.NO_PUBLISHER, snapshot.LOGIN_FAILED, snapshot.FAILED]:
+        print(f"{result}: {counts.get(result, 0)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enable SNAPSHOTs on the Central namespaces of many projects.")
+    parser.add_argument("projects_file", nargs="?", default="-",
+                        help="file with one project name per line (default: stdin)")
+    parser.add_argument("-j", "--jobs", type=int, default=_DEFAULT_JOBS,
+                        help=f"number of projects processed concurrently (default: {_DEFAULT_JOBS})")
+    parser.add_argument("--fast", action="store_true",
+                        help="run headless and block images, fonts, media and third-party requests")
+    args = parser.parse_args()
+
+    projects = read_projects(args.projects_file)
+    if not projects:
+        print("ERROR: no project names given")
+        sys.exit(1)
+
+    # projects with all SNAPSHOTs enabled in a recent run are not logged in (only with playwright/probe-ttl)
+    results = [(project_name, snapshot.ALREADY_ENABLED) for project_name in projects
+               if not snapshot.needs_check(project_name)]
+    skipped = {project_name for project_name, _ in results}
+    projects = [project_name for project_name in projects if project_name not in skipped]
+
+    if projects:
+        jobs = max(1, min(args.jobs, len(projects)))
+        print(f"Processing {len(projects)} project(s) with {jobs} worker(s)")
+
+        with multiprocessing.Manager() as manager:
+            project_queue = manager.Queue()
+            result_queue = manager.Queue()
+            for project_name in projects:
+                project_queue.put(project_name)
+
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                futures = [executor.submit(worker, project_queue, result_queue, args.fast) for _ in range(jobs)]
+                for future in futures:
+                    # e.g. the browser cannot be launched or the worker process died
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"ERROR: worker failed ({e})", file=sys.stderr)
+
+            done = {}
+            while not result_queue.empty():
+                project_name, result = result_queue.get()
+                done[project_name] = result
+            for project_name in projects:
+                if project_name not in done:
+                    print(f"{project_name}: not processed")
+                results.append((project_name, done.get(project_name, snapshot.FAILED)))
+
+    print_summary(results)
+
+    if any(result in (snapshot.LOGIN_FAILED, snapshot.FAILED) for _, result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -102,6 +102,8 @@ $(printf "${GREEN}GitHub Commands:${NC}")
   github setup-bot <project_name>          Setup GitHub bot for a project
   github setup-otterdog <project_name>     Setup OtterDog for a project
   github setup-token <kind> <project_name> Setup GitHub token for a kind (e.g. renovate)
+  github rotate-tokens --policy <policy> [projects] Create/regenerate the tokens of many bots
+  github tasks <project_name> <task>...   Run GitHub bot tasks with one login
   github create-webhook <project_name>     Create GitHub webhook
   github deploy-key <project_name>         Setup deploy key
   github gen-credentials <project_name>    Generate GitHub credentials
@@ -127,7 +129,7 @@ $(printf "${GREEN}Password Store Commands:${NC}")
   pass add-creds-gpg <project_name>                Add GPG credentials
   pass gen-ssh-key <project_name>                  Generate SSH key
   pass change-ssh-passphrase <project_name>        Change SSH key passphrase
-  pass stats                                       Show password store statistics
+  pass stats [--api] [--json] [--site SITE]       Show password store bot statistics
 
 $(printf "${GREEN}Matrix Commands:${NC}")
   matrix setup-bot <project_name>                  Setup Matrix bot for a project
@@ -161,6 +163,7 @@ $(printf "${GREEN}Build Tools Commands:${NC}")
 
 $(printf "${GREEN}Repository Commands:${NC}")
   repo size <repo> [args...]                       Show Nexus repository size report
+  repo inventory <command> [args...]               Nexus assets inventory and size history
 
 $(printf "${GREEN}Check Commands:${NC}")
   check api-token <project_name> <service> [token_name]    Test API token from Vault
@@ -181,6 +184,8 @@ $(printf "${GREEN}Commands:${NC}")
   setup-bot <project_name>         Setup GitHub bot for a project
   setup-otterdog <project_name>    Setup OtterDog for a project
   setup-token <kind> <project_name>       Setup GitHub token for a kind (e.g. renovate)
+  rotate-tokens --policy <policy> [projects]  Create/regenerate otterdog and renovate tokens of many bots
+  tasks <project_name> <task>...   Run tasks with one login (otterdog-token, renovate-token, jenkins-token, ssh-key, 2fa-check)
   create-webhook <project_name>    Create GitHub webhook
   deploy-key <project_name>        Setup deploy key
   gen-credentials <project_name>   Generate GitHub credentials
@@ -188,6 +193,8 @@ $(printf "${GREEN}Commands:${NC}")
 $(printf "${GREEN}Examples:${NC}")
   ci-adm github setup-bot technology.cbi
   ci-adm github setup-token renovate technology.cbi
+  ci-adm github rotate-tokens --policy regenerate-older-than --days 180 --all-bots --fast
+  ci-adm github tasks technology.cbi otterdog-token renovate-token ssh-key
   ci-adm github create-webhook technology.cbi
   ci-adm github deploy-key technology.cbi
 EOF
@@ -373,11 +380,16 @@ $(printf "${BLUE}ci-adm repo${NC}") - Repository management
 $(printf "${GREEN}Commands:${NC}")
   size <repo> [nexus_host]                              Show Nexus repository size report
   size <repo> <username> <password> [nexus_host]        Show Nexus repository size report with credentials
+  inventory refresh [--all] [repo...]                   Reconcile the local assets inventory with Nexus
+  inventory report [--days 7]                           Show the size and growth of all inventoried repositories
+  inventory history <repo>                              Show the size history of a repository
 
 $(printf "${GREEN}Examples:${NC}")
   ci-adm repo size cbi-maven2-releases
   ci-adm repo size cbi-maven2-releases repo.eclipse.org
   ci-adm repo size cbi-maven2-releases myuser mypass
+  ci-adm repo size --json --partition org.eclipse.jetty --partition org.eclipse.jdt cbi-maven2-releases
+  ci-adm repo inventory refresh --all && ci-adm repo inventory report --days 7
 EOF
       ;;
 
@@ -441,6 +453,12 @@ execute_command() {
         setup-token)
           exec "${SCRIPT_DIR}/github/setup_token.sh" "$@"
           ;;
+        rotate-tokens)
+          exec python3 "${SCRIPT_DIR}/github/playwright/gh_rotate_tokens.py" "$@"
+          ;;
+        tasks)
+          exec python3 "${SCRIPT_DIR}/github/playwright/gh_tasks.py" "$@"
+          ;;
         create-webhook)
           exec "${SCRIPT_DIR}/github/create_webhook.sh" "$@"
           ;;
@@ -683,6 +701,9 @@ execute_command() {
         size)
           exec "${SCRIPT_DIR}/repo/repo_size.sh" "$@"
           ;;
+        inventory)
+          exec python3 "${SCRIPT_DIR}/repo/nexus_inventory.py" "$@"
+          ;;
         *)
           print_error "Unknown command for repo: $command"
           echo ""
@@ -715,6 +736,15 @@ execute_command() {
   esac
 }
 
+# Read the local config once, the module scripts then get its values from the environment
+# (see utils/local_config.sh get_var) instead of running jq for every value
+load_config() {
+  local exports
+  if [[ -f "${HOME}/.cbi/config" ]] && exports="$(python3 "${SCRIPT_DIR}/ciadmin/config.py" export)"; then
+    eval "${exports}"
+  fi
+}
+
 # Main
 main() {
   if [[ $# -eq 0 ]]; then
@@ -738,6 +768,7 @@ main() {
       ;;
     
     *)
+      load_config
       execute_command "$@"
       ;;
   esac
@@ -0,0 +1,2 @@
+# Shared code of the ci-admin Python scripts (Playwright site drivers, pass store, config, ...).
+# Keep this file and the module imports light: the scripts are started many times per provisioning session.
@@ -0,0 +1,317 @@
+import argparse
+import contextlib
+import importlib
+import json
+import math
+import multiprocessing
+import os
+import queue
+import secrets
+import sys
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
+
+REPO_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from ciadmin import fixture_server
+
+# Offline benchmark of the Playwright flows against the local fixture server (ciadmin/fixture_server.py).
+# The real URLs used by the scripts are routed to the fixture server, pass and the clipboard fallback are replaced
+# by in-memory stand-ins, so nothing leaves the machine and no credentials are needed.
+#
+# Usage:
+#   python ciadmin/bench.py [SCENARIO ...] [-c 1,2,4] [-n FLOWS] [--latency MS] [--fast] [--json FILE]
+
+# scenario -> (folder, common module, script module, flow function); login-only scenarios have no script
+SCENARIOS = {
+    "github-otterdog": ("github/playwright", "common", "gh_create_otterdog_token", "run"),
+    "github-renovate": ("github/playwright", "common", "gh_create_renovate_token", "run"),
+    "central-token": ("central_sonatype/playwright", "common", "central_create_token", "run"),
+    "central-snapshot": ("central_sonatype/playwright", "common", "central_namespace_snapshot", "snapshot_project"),
+    "pypi-login": ("service-accounts/playwright", "pypi_common", None, None),
+    "npmjs-login": ("service-accounts/playwright", "npmjs_common", None, None),
+}
+
+# element that is shown once the login-only scenarios are logged in
+_LOGGED_IN_LABELS = {
+    "pypi_common": "View menu",
+    "npmjs_common": "Profile menu",
+}
+
+# functions timed on their own, in addition to the whole flow
+TIMED_COMMON = ["login", "nav_to_token_settings"]
+TIMED_SCRIPT = ["setup_token", "check", "check_api", "check_ui"]
+
+_DEFAULT_CONCURRENCY = "1,2,4"
+_DEFAULT_FLOWS = 8
+_DEFAULT_TIMEOUT = 10000
+
+# per worker process
+_timings = []
+_current = {}
+_pass_inserts = {}
+_api_headers = {}
+
+
+def _timed(name, function):
+    def wrapper(*args, **kwargs):
+        start = time.monotonic()
+        ok = False
+        try:
+            result = function(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            _timings.append((name, (time.monotonic() - start) * 1000, ok))
+    return wrapper
+
+
+def _pass_show(path):
+    # bots/<project>/<site>/<item>
+    project_name, item = path.split("/")[1], path.split("/")[-1]
+    if item == "username":
+        return project_name
+    if item == "password":
+        return fixture_server.PASSWORD
+    if item == "2FA-seed":
+        return fixture_server.TOTP_SEED
+    return _pass_inserts.get(path, "")
+
+
+def _pass_insert(path, value):
+    _pass_inserts[path] = value
+
+
+def _clipboard_paste():
+    # the fixture pages put copied values into window.fixtureClipboard
+    page = _current["context"].pages[-1]
+    return page.evaluate("window.fixtureClipboard || ''")
+
+
+def _route_to_fixtures(fixture_url, session_id):
+    def route_fixture(route):
+        request = route.request
+        url = urlparse(request.url)
+        if url.hostname not in fixture_server.SITES:
+            route.abort()
+            return
+        target = fixture_url + "/" + url.hostname + url.path + ("?" + url.query if url.query else "")
+        headers = dict(request.headers)
+        headers[fixture_server.SESSION_HEADER] = session_id
+        # redirects are passed on to the browser, so that page.url changes like on the real sites
+        response = route.fetch(url=target, headers=headers, max_redirects=0)
+        route.fulfill(response=response)
+    return route_fixture
+
+
+def _login_flow(common):
+    def run(browser, project_name, fast):
+        context = common.driver.new_context(browser, fast)
+        page = context.new_page()
+        page.set_default_timeout(_DEFAULT_TIMEOUT)
+
+        username = common.get_pass_creds(project_name, "username")
+        password = common.get_pass_creds(project_name, "password")
+        common.login(page, project_name, username, password)
+        page.get_by_label(_LOGGED_IN_LABELS[common.__name__]).wait_for()
+        common.signout(page)
+
+        page.close()
+        context.close()
+    return run
+
+
+def setup_worker(scenario, fixture_url):
+    folder, common_name, script_name, flow_name = SCENARIOS[scenario]
+    sys.path.insert(0, os.path.join(REPO_ROOT, folder))
+
+    from ciadmin import config, passstore, probes, sites
+
+    # no local config needed, session reuse stays disabled
+    config.override({})
+    # every flow runs its UI steps, nothing is recorded for the fixture accounts
+    probes.enabled = False
+    passstore.show = _pass_show
+    passstore.insert = _pass_insert
+    clipboard = types.ModuleType("pyperclip")
+    clipboard.paste = _clipboard_paste
+    sys.modules["pyperclip"] = clipboard
+
+    common = importlib.import_module(common_name)
+    # fresh fixture accounts have no tokens yet, but a prompt must never block a worker
+    common.ask_to_continue = lambda *args, **kwargs: False
+
+    driver = sites.get(common.SITE)
+    new_context = driver.new_context
+
+    def new_fixture_context(browser, fast=False):
+        context = new_context(browser, fast)
+        session_id = secrets.token_hex(8)
+        # registered last, so it takes precedence over the fast mode route
+        context.route("**/*", _route_to_fixtures(fixture_url, session_id))
+        _current["context"] = context
+        _api_headers[fixture_server.SESSION_HEADER] = session_id
+        return context
+
+    driver.new_context = new_fixture_context
+
+    for name in TIMED_COMMON:
+        if hasattr(common, name):
+            setattr(common, name, _timed(name, getattr(common, name)))
+
+    if script_name is None:
+        return _login_flow(common)
+
+    script = importlib.import_module(script_name)
+    if hasattr(script, "PORTAL_URL"):
+        # direct API calls of the script go to the fixture server, in the session of the current context
+        script.PORTAL_URL = fixture_url + "/" + urlparse(script.PORTAL_URL).hostname
+        script.API_HEADERS = _api_headers
+    for name in TIMED_SCRIPT:
+        if hasattr(script, name):
+            setattr(script, name, _timed(name, getattr(script, name)))
+    return getattr(script, flow_name)
+
+
+def worker(scenario, fixture_url, project_queue, fast, verbose):
+    flow = _timed("flow", setup_worker(scenario, fixture_url))
+
+    from ciadmin import launcher
+    from playwright.sync_api import sync_playwright
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(sys.stdout if verbose else devnull):
+        with sync_playwright() as playwright:
+            browser = launcher.launch(playwright, fast)
+            while True:
+                try:
+                    project_name = project_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                try:
+                    flow(browser, project_name, fast)
+                except (Exception, SystemExit) as e:
+                    print(f"{project_name}: {scenario} failed ({e})", file=sys.stderr)
+            browser.close()
+    return _timings
+
+
+def percentile(values, p):
+    # nearest-rank percentile
+    values = sorted(values)
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def run_level(scenario, concurrency, flows, fixture_url, fast, verbose):
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager:
+        project_queue = manager.Queue()
+        for i in range(flows):
+            # unique bot names, so every flow starts with a fresh fixture account
+            project_queue.put(f"bench-{scenario}-{concurrency}-{i}-{secrets.token_hex(3)}")
+
+        timings = []
+        start = time.monotonic()
+        with ProcessPoolExecutor(max_workers=concurrency, mp_context=context) as executor:
+            futures = [executor.submit(worker, scenario, fixture_url, project_queue, fast, verbose)
+                       for _ in range(concurrency)]
+            for future in futures:
+                timings.extend(future.result())
+        wall = time.monotonic() - start
+
+    spans = {}
+    for name, ms, ok in timings:
+        span = spans.setdefault(name, {"count": 0, "failed": 0, "ms": []})
+        span["count"] += 1
+        if ok:
+            span["ms"].append(ms)
+        else:
+            span["failed"] += 1
+
+    flow = spans.get("flow", {"count": 0, "failed": 0})
+    result = {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "flows": flow["count"],
+        "failed": flow["failed"],
+        "wall_s": round(wall, 2),
+        "contexts_per_minute": round((flow["count"] - flow["failed"]) / wall * 60, 1),
+        "spans": {},
+    }
+    for name, span in spans.items():
+        result["spans"][name] = {
+            "count": span["count"],
+            "failed": span["failed"],
+            "p50_ms": round(percentile(span["ms"], 50)) if span["ms"] else None,
+            "p95_ms": round(percentile(span["ms"], 95)) if span["ms"] else None,
+        }
+    return result
+
+
+def print_result(result):
+    print("")
+    print(f"{result['scenario']} (concurrency {result['concurrency']}): {result['flows']} flow(s), "
+          f"{result['failed']} failed, {result['wall_s']} s, {result['contexts_per_minute']} contexts/min")
+    print(f"  {'span':24} {'count':>6} {'failed':>6} {'p50 ms':>8} {'p95 ms':>8}")
+    for name in ["flow"] + TIMED_COMMON + TIMED_SCRIPT:
+        if name not in result["spans"]:
+            continue
+        span = result["spans"][name]
+        p50 = "-" if span["p50_ms"] is None else str(span["p50_ms"])
+        p95 = "-" if span["p95_ms"] is None else str(span["p95_ms"])
+        print(f"  {name:24} {span['count']:>6} {span['failed']:>6} {p50:>8} {p95:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Playwright flows against local fixture sites.")
+    parser.add_argument("scenarios", nargs="*",
+                        help="scenarios to run (default: all): " + ", ".join(SCENARIOS))
+    parser.add_argument("-c", "--concurrency", default=_DEFAULT_CONCURRENCY,
+                        help=f"comma separated numbers of parallel browsers (default: {_DEFAULT_CONCURRENCY})")
+    parser.add_argument("-n", "--flows", type=int, default=_DEFAULT_FLOWS,
+                        help=f"flows per scenario and concurrency level (default: {_DEFAULT_FLOWS})")
+    parser.add_argument("--latency", type=int, default=0, help="delay added to every fixture response in ms")
+    parser.add_argument("--jitter", type=int, default=0, help="random extra delay of up to this many ms")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="fraction of fixture requests answered with 503 (e.g. 0.05)")
+    parser.add_argument("--fixture-url", help="use an already running fixture server instead of starting one")
+    parser.add_argument("--fast", action="store_true", help="run the flows in fast mode (headless)")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show the output of the flows")
+    args = parser.parse_args()
+
+    scenarios = args.scenarios or list(SCENARIOS)
+    unknown = [scenario for scenario in scenarios if scenario not in SCENARIOS]
+    if unknown:
+        parser.error("unknown scenario(s): " + ", ".join(unknown))
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    fixture_url = args.fixture_url
+    if fixture_url is None:
+        server = fixture_server.start(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate)
+        fixture_url = server.url
+    print("Fixture server: " + fixture_url)
+
+    results = []
+    for scenario in scenarios:
+        for concurrency in levels:
+            result = run_level(scenario, concurrency, args.flows, fixture_url, args.fast, args.verbose)
+            print_result(result)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print("")
+        print("Results written to " + args.json)
+
+    if any(result["failed"] > 0 for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+# Per-session credential broker. It resolves the password store folders once and keeps the decrypted secrets in
+# memory for a limited time, so that bulk admin sessions do not decrypt the same entries over and over. The Python
+# scripts (ciadmin.passstore) and passw() in pass/pass_wrapper.sh use it when it is running. Nothing is written to
+# disk, the cache is dropped when the broker stops (idle timeout, stop command or signal). A cached secret is only
+# served while its .gpg file is unchanged, so entries written with 'pass insert' directly are decrypted again.
+#
+# Only the user that started the broker can connect (socket in a private folder, peer credentials checked).
+#
+# Protocol, one request per connection:
+#   GET <store> <path>      ->  "OK\n<secret>" or "ERR <message>\n"
+#   FORGET <store> [<path>] ->  "OK\n"   drops one entry or the whole store from the cache
+#   STATS                   ->  "OK\n<stats>"
+#   STOP                    ->  "OK\n"
+#
+# Usage:
+#   python broker.py start [--detach] [--ttl SECONDS] [--idle-timeout SECONDS]
+#   python broker.py get <store> <path>
+#   python broker.py status
+#   python broker.py stop
+
+STORES = ["cbi", "it"]
+
+_DEFAULT_TTL = 900
+_DEFAULT_IDLE_TIMEOUT = 3600
+
+
+def socket_path():
+    if os.environ.get("CBI_BROKER_SOCKET"):
+        return os.environ["CBI_BROKER_SOCKET"]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or os.path.expanduser("~/.cbi")
+    return os.path.join(runtime_dir, "cbi-broker", "broker.sock")
+
+
+class Broker:
+    def __init__(self, ttl, idle_timeout):
+        from ciadmin import config
+        self.ttl = ttl
+        self.idle_timeout = idle_timeout
+        # store folders are resolved once, not per lookup
+        self.store_dirs = {}
+        for store in STORES:
+            try:
+                store_dir = config.password_store_dir(store)
+            except (OSError, ValueError):
+                store_dir = None
+            if store_dir:
+                self.store_dirs[store] = os.path.realpath(store_dir)
+        self.cache = {}
+        self.lock = threading.Lock()
+        self.last_used = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.server = None
+
+    def _gpg_file(self, store, path):
+        store_dir = self.store_dirs.get(store)
+        if store_dir is None:
+            raise LookupError(f"store '{store}' is not configured")
+        gpg_file = os.path.realpath(os.path.join(store_dir, path + ".gpg"))
+        if not gpg_file.startswith(store_dir + os.sep) or not os.path.isfile(gpg_file):
+            raise LookupError(f"pass entry not found - {path} in store {store}")
+        return gpg_file
+
+    def _decrypt(self, gpg_file, path):
+        result = subprocess.run(["gpg", "--quiet", "--batch", "--yes", "--decrypt", gpg_file],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise LookupError(f"unable to decrypt {path}: {result.stderr.decode(errors='replace').strip()}")
+        return result.stdout
+
+    def get(self, store, path):
+        self.last_used = time.time()
+        key = (store, path)
+        gpg_file = self._gpg_file(store, path)
+        # entries written without forget (e.g. 'pass insert' in a script) are noticed by their file
+        try:
+            stat = os.stat(gpg_file)
+        except OSError:
+            raise LookupError(f"pass entry not found - {path} in store {store}")
+        version = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is not None and entry[1] > time.time() and entry[2] == version:
+                self.hits += 1
+                return entry[0]
+        value = self._decrypt(gpg_file, path)
+        with self.lock:
+            self.misses += 1
+            self.cache[key] = (value, time.time() + self.ttl, version)
+        return value
+
+    def forget(self, store, path=None):
+        with self.lock:
+            for key in [key for key in self.cache if key[0] == store and (path is None or key[1] == path)]:
+                del self.cache[key]
+
+    def stats(self):
+        with self.lock:
+            now = time.time()
+            return (f"entries: {sum(1 for value, expires, version in self.cache.values() if expires > now)}\n"
+                    f"hits: {self.hits}\nmisses: {self.misses}\nttl: {self.ttl}\n"
+                    f"idle: {int(now - self.last_used)}/{self.idle_timeout}\n"
+                    f"stores: {', '.join(f'{store}={store_dir}' for store, store_dir in self.store_dirs.items())}\n")
+
+    def watch(self):
+        while True:
+            time.sleep(10)
+            with self.lock:
+                now = time.time()
+                for key in [key for key, (value, expires, version) in self.cache.items() if expires <= now]:
+                    del self.cache[key]
+            if time.time() - self.last_used > self.idle_timeout:
+                print("Idle timeout reached. Shutting down...")
+                self.shutdown()
+                return
+
+    def shutdown(self):
+        with self.lock:
+            self.cache.clear()
+        if self.server is not None:
+            threading.Thread(target=self.server.shutdown).start()
+
+
+def _handler(broker):
+    import socketserver
+    import struct
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            # only the user running the broker is served
+            credentials = self.request.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+            if struct.unpack("3i", credentials)[1] != os.getuid():
+                return
+            request = self.rfile.readline().decode().rstrip("\n").split(" ", 2)
+            command = request[0]
+            try:
+                if command == "GET" and len(request) == 3:
+                    self.wfile.write(b"OK\n" + broker.get(request[1], request[2]))
+                elif command == "FORGET" and len(request) >= 2:
+                    broker.forget(request[1], request[2] if len(request) == 3 else None)
+                    self.wfile.write(b"OK\n")
+                elif command == "STATS":
+                    self.wfile.write(b"OK\n" + broker.stats().encode())
+                elif command == "STOP":
+                    self.wfile.write(b"OK\n")
+                    broker.shutdown()
+                else:
+                    self.wfile.write(b"ERR unknown request\n")
+            except LookupError as e:
+                self.wfile.write(f"ERR {e}\n".encode())
+
+    return Handler
+
+
+def request(line, timeout=5):
+    # sends one request to the broker, returns (ok, payload bytes) or None if the broker is not running
+    path = socket_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(path)
+            client.sendall(line.encode() + b"\n")
+            chunks = []
+            while True:
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+    except OSError:
+        return None
+    response = b"".join(chunks)
+    status, _, payload = response.partition(b"\n")
+    if status == b"OK":
+        return True, payload
+    return False, status[4:]
+
+
+def get(store, path):
+    # decrypted secret from the broker, None if the broker is not running or does not know the entry
+    response = request(f"GET {store} {path}")
+    if response is None or not response[0]:
+        return None
+    return response[1].decode()
+
+
+def forget(store, path=None):
+    request(f"FORGET {store} {path}" if path else f"FORGET {store}")
+
+
+def start(ttl, idle_timeout):
+    if request("STATS") is not None:
+        print("Credential broker is already running.")
+        return
+
+    path = socket_path()
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    os.chmod(os.path.dirname(path), 0o700)
+    if os.path.exists(path):
+        # left over by a broker that did not stop cleanly
+        os.remove(path)
+
+    import socketserver
+    broker = Broker(ttl, idle_timeout)
+    old_umask = os.umask(0o177)
+    try:
+        broker.server = socketserver.ThreadingUnixStreamServer(path, _handler(broker))
+    finally:
+        os.umask(old_umask)
+
+    import signal
+    signal.signal(signal.SIGTERM, lambda signum, frame: broker.shutdown())
+    threading.Thread(target=broker.watch, daemon=True).start()
+
+    print(f"Credential broker listening on {path} (ttl: {ttl}s, idle timeout: {idle_timeout}s)", flush=True)
+    try:
+        broker.server.serve_forever()
+    except KeyboardInterrupt:
+        broker.shutdown()
+    finally:
+        broker.server.server_close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def main():
+    # make the ciadmin package importable when the broker is run as a script
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    parser = argparse.ArgumentParser(description="Per-session credential broker for the ci-admin scripts.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    start_parser = subparsers.add_parser("start", help="start the broker in the foreground")
+    start_parser.add_argument("--detach", action="store_true", help="start the broker in the background")
+    start_parser.add_argument("--ttl", type=int, default=_DEFAULT_TTL,
+                              help=f"seconds a decrypted secret is kept in memory (default: {_DEFAULT_TTL})")
+    start_parser.add_argument("--idle-timeout", type=int, default=_DEFAULT_IDLE_TIMEOUT,
+                              help=f"stop after this many seconds without requests (default: {_DEFAULT_IDLE_TIMEOUT})")
+    get_parser = subparsers.add_parser("get", help="print a secret (used by pass_wrapper.sh)")
+    get_parser.add_argument("store", choices=STORES)
+    get_parser.add_argument("path")
+    forget_parser = subparsers.add_parser("forget", help="drop a secret or a whole store from the cache")
+    forget_parser.add_argument("store", choices=STORES)
+    forget_parser.add_argument("path", nargs="?")
+    subparsers.add_parser("status", help="show the cache statistics")
+    subparsers.add_parser("stop", help="stop the broker")
+    args = parser.parse_args()
+
+    if args.command == "start":
+        if args.detach:
+            subprocess.Popen([sys.executable, os.path.abspath(__file__), "start", "--ttl", str(args.ttl),
+                              "--idle-timeout", str(args.idle_timeout)],
+                             stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, start_new_session=True)
+            for _ in range(50):
+                if request("STATS") is not None:
+                    print("Credential broker started on " + socket_path())
+                    return
+                time.sleep(0.1)
+            print("ERROR: the credential broker did not start.", file=sys.stderr)
+            sys.exit(1)
+        start(args.ttl, args.idle_timeout)
+    elif args.command == "get":
+        response = request(f"GET {args.store} {args.path}")
+        if response is None:
+            print("ERROR: credential broker is not running.", file=sys.stderr)
+            sys.exit(2)
+        if not response[0]:
+            print("ERROR: " + response[1].decode(), file=sys.stderr)
+            sys.exit(1)
+        sys.stdout.buffer.write(response[1])
+    elif args.command == "forget":
+        forget(args.store, args.path)
+    elif args.command == "status":
+        response = request("STATS")
+        if response is None:
+            print("Credential broker is not running.")
+            sys.exit(1)
+        print(response[1].decode(), end="")
+    elif args.command == "stop":
+        if request("STOP") is None:
+            print("Credential broker is not running.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Keeps a warm Playwright browser server running, so that the Playwright scripts can connect to it
+# instead of starting a new Firefox every time. The daemon stops itself after an idle timeout.
+#
+# Usage:
+#   python browser_daemon.py start [--headless] [--idle-timeout SECONDS]
+#   python browser_daemon.py status
+#   python browser_daemon.py stop
+
+STATE_FILE = os.path.expanduser('~/.cbi/browser-daemon.json')
+_DEFAULT_IDLE_TIMEOUT = 1800
+
+
+class Daemon:
+    def __init__(self, headless, idle_timeout):
+        self.headless = headless
+        self.idle_timeout = idle_timeout
+        self.started = time.time()
+        self.last_used = time.time()
+        self.leases = 0
+        self.ws_endpoint = None
+        self.server_process = None
+        self.http_server = None
+
+    def start_browser_server(self):
+        # the browser server is only reachable from localhost and with a random path
+        config = {"headless": self.headless, "host": "127.0.0.1", "port": 0, "wsPath": "/" + secrets.token_hex(16)}
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as config_file:
+            json.dump(config, config_file)
+        self.server_process = subprocess.Popen(
+            [sys.executable, "-m", "playwright", "launch-server", "--browser", "firefox", "--config", config_file.name],
+            stdout=subprocess.PIPE, text=True)
+        # the browser server prints its websocket endpoint once it is ready
+        self.ws_endpoint = self.server_process.stdout.readline().strip()
+        os.remove(config_file.name)
+        if not self.ws_endpoint.startswith("ws://"):
+            self.server_process.terminate()
+            raise RuntimeError("unable to start Playwright browser server")
+
+    def touch(self):
+        self.last_used = time.time()
+        self.leases += 1
+
+    def health(self):
+        alive = self.server_process is not None and self.server_process.poll() is None
+        return {
+            "status": "ok" if alive else "down",
+            "headless": self.headless,
+            "uptime": int(time.time() - self.started),
+            "idle": int(time.time() - self.last_used),
+            "idle_timeout": self.idle_timeout,
+            "leases": self.leases,
+        }
+
+    def watch_idle(self):
+        while True:
+            time.sleep(10)
+            if time.time() - self.last_used > self.idle_timeout or self.server_process.poll() is not None:
+                print("Idle timeout reached or browser server gone. Shutting down...")
+                self.shutdown()
+                return
+
+    def shutdown(self):
+        if self.server_process is not None and self.server_process.poll() is None:
+            self.server_process.terminate()
+            self.server_process.wait()
+        if os.path.isfile(STATE_FILE):
+            os.remove(STATE_FILE)
+        if self.http_server is not None:
+            threading.Thread(target=self.http_server.shutdown).start()
+
+
+def _handler(daemon):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, daemon.health())
+            elif self.path == "/lease":
+                # a client is about to connect, this also resets the idle timer
+                daemon.touch()
+                self._send(200, {"ws_endpoint": daemon.ws_endpoint, "headless": daemon.headless})
+            elif self.path == "/stop":
+                self._send(200, {"status": "stopping"})
+                daemon.shutdown()
+            else:
+                self._send(404, {"error": "not found"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def read_state():
+    if not os.path.isfile(STATE_FILE):
+        return None
+    with open(STATE_FILE, 'r') as f:
+        return json.load(f)
+
+
+def request(path, timeout=2):
+    state = read_state()
+    if state is None:
+        return None
+    try:
+        with urllib.request.urlopen(state["url"] + path, timeout=timeout) as response:
+            return json.load(response)
+    except OSError:
+        return None
+
+
+def start(headless, idle_timeout):
+    if request("/health") is not None:
+        print("Browser daemon is already running.")
+        return
+
+    daemon = Daemon(headless, idle_timeout)
+    daemon.start_browser_server()
+
+    daemon.http_server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(daemon))
+    url = "http://127.0.0.1:%d" % daemon.http_server.server_address[1]
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    with open(STATE_FILE, 'w') as f:
+        json.dump({"url": url, "pid": os.getpid()}, f)
+    os.chmod(STATE_FILE, 0o600)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.shutdown())
+    threading.Thread(target=daemon.watch_idle, daemon=True).start()
+
+    print("Browser daemon listening on " + url + " (headless: " + str(headless) + ")")
+    try:
+        daemon.http_server.serve_forever()
+    except KeyboardInterrupt:
+        daemon.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm Playwright browser server for the ci-admin Playwright scripts.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    start_parser = subparsers.add_parser("start", help="start the daemon in the foreground")
+    start_parser.add_argument("--headless", action="store_true", help="run the browser headless (used by --fast)")
+    start_parser.add_argument("--idle-timeout", type=int, default=_DEFAULT_IDLE_TIMEOUT,
+                              help=f"stop after this many seconds without clients (default: {_DEFAULT_IDLE_TIMEOUT})")
+    subparsers.add_parser("status", help="show the health of the daemon")
+    subparsers.add_parser("stop", help="stop the daemon")
+    args = parser.parse_args()
+
+    if args.command == "start":
+        start(args.headless, args.idle_timeout)
+    elif args.command == "status":
+        health = request("/health")
+        if health is None:
+            print("Browser daemon is not running.")
+            sys.exit(1)
+        print(json.dumps(health, indent=2))
+    elif args.command == "stop":
+        if request("/stop") is None:
+            print("Browser daemon is not running.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from ciadmin import clipboard, waits
+
+# Capture of newly created token values. Tokens are read from the page or from the JSON response of the request
+# that created them, so that flows running in parallel do not share the system clipboard. Copying to the
+# clipboard is only the fallback for pages where neither works.
+
+
+def text(locator, budget=5000, name="token"):
+    # text of the element that shows the token, None if it does not show up
+    if not waits.for_locator(locator, budget=budget, name="capture: " + name):
+        return None
+    value = locator.inner_text().strip()
+    return value or None
+
+
+def copied(copy_button):
+    print("Token not found on the page, falling back to the clipboard.")
+    copy_button.click()
+    return clipboard.paste()
+
+
+class JsonResponses:
+    # collects the JSON responses to requests with the given method and a matching URL while active, e.g. around
+    # the click that creates a token. url(request_url) selects the request that returns the token, so that other
+    # responses (session, profile, ...) are never read.
+    def __init__(self, page, url, method="POST"):
+        self.page = page
+        self.url = url
+        self.method = method
+        self.responses = []
+
+    def _on_response(self, response):
+        if response.request.method == self.method and self.url(response.url) and \
+                "json" in response.headers.get("content-type", ""):
+            self.responses.append(response)
+
+    def __enter__(self):
+        self.page.on("response", self._on_response)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.page.remove_listener("response", self._on_response)
+        return False
+
+    def find(self, key):
+        # non-empty string value of the key at the top level of a collected response
+        from playwright.sync_api import Error
+        for response in self.responses:
+            try:
+                data = response.json()
+            except (Error, ValueError):
+                continue
+            if isinstance(data, dict) and isinstance(data.get(key), str) and data[key]:
+                return data[key]
+        return None
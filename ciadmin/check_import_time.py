@@ -0,0 +1,71 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Checks that importing the site common modules stays cheap: heavy dependencies must only be imported
+# when they are actually used, so that e.g. a script that fails on its arguments returns immediately.
+#
+# Usage:
+#   python ciadmin/check_import_time.py [--budget MILLISECONDS]
+
+REPO_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# (folder, module) pairs that are imported by the Playwright scripts
+MODULES = [
+    ("github/playwright", "common"),
+    ("central_sonatype/playwright", "common"),
+    ("service-accounts/playwright", "pypi_common"),
+    ("service-accounts/playwright", "npmjs_common"),
+]
+
+# modules that must not be imported when only the common module is loaded
+HEAVY_MODULES = ["playwright", "pyperclip", "sshpubkeys", "requests"]
+
+_DEFAULT_BUDGET = 100
+
+
+def import_times(folder, module):
+    # python -X importtime writes "import time: self [us] | cumulative | imported package" lines to stderr
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+                          cwd=os.path.join(REPO_ROOT, folder), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {module} in {folder} failed:\n{proc.stderr}")
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = [field.strip() for field in line[len("import time:"):].split("|")]
+        if not fields[1].isdigit():
+            continue
+        times[fields[2]] = int(fields[1])
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of the Playwright site modules.")
+    parser.add_argument("--budget", type=int, default=_DEFAULT_BUDGET,
+                        help=f"maximum cumulative import time per module in ms (default: {_DEFAULT_BUDGET})")
+    args = parser.parse_args()
+
+    failed = False
+    for folder, module in MODULES:
+        times = import_times(folder, module)
+        cumulative_ms = times.get(module, 0) / 1000
+        heavy = sorted(name for name in times if name.split(".")[0] in HEAVY_MODULES)
+
+        status = "OK"
+        if cumulative_ms > args.budget or heavy:
+            status = "FAILED"
+            failed = True
+        print(f"{status:6} {folder}/{module}: {cumulative_ms:.1f} ms (budget: {args.budget} ms)")
+        if heavy:
+            print("       eagerly imported: " + ", ".join(heavy))
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
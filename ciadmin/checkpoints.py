@@ -0,0 +1,123 @@
+import json
+import os
+import sys
+import time
+
+# Durable per-bot checkpoints of multi-stage flows (e.g. the GitHub signup: account, SSH key, token, 2FA).
+#
+# A flow is a list of stages in execution order. When a stage ends, it is recorded in
+# ~/.cbi/checkpoints/<project>/<flow>.json with the pass items it wrote. A rerun starts at the first stage that
+# is not recorded, or whose pass items are gone, or that requires a stage that runs again. A stage that is not
+# recorded yet can still be skipped by its probe (ciadmin/probes.py), it is then recorded as probed.
+# No secrets are written to the checkpoint files.
+#
+# Usage:
+#   python checkpoints.py show [PROJECT]
+#   python checkpoints.py reset PROJECT [FLOW]
+
+CHECKPOINT_DIR = os.path.expanduser('~/.cbi/checkpoints')
+
+
+class Stage:
+    def __init__(self, name, run, requires=(), artifacts=(), probe=None):
+        # run(page, project_name) does the stage in the browser, artifacts are the pass items it writes,
+        # probe(project_name) returns True if the stage is done already
+        self.name = name
+        self.run = run
+        self.requires = list(requires)
+        self.artifacts = list(artifacts)
+        self.probe = probe
+
+
+class Checkpoints:
+    def __init__(self, flow, project_name, driver):
+        self.flow = flow
+        self.project_name = project_name
+        self.driver = driver
+        self.path = os.path.join(CHECKPOINT_DIR, project_name, flow + ".json")
+        try:
+            with open(self.path, 'r') as f:
+                self.stages = json.load(f)["stages"]
+        except (OSError, ValueError, KeyError):
+            self.stages = {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        tmp_file = self.path + "." + str(os.getpid())
+        with open(tmp_file, 'w') as f:
+            json.dump({"flow": self.flow, "project": self.project_name, "stages": self.stages}, f, indent=2)
+        os.replace(tmp_file, self.path)
+
+    def is_done(self, stage):
+        # recorded, and the pass items of the stage are still in the store
+        from ciadmin import probes
+        entry = self.stages.get(stage.name)
+        return entry is not None and probes.in_pass(self.driver, self.project_name, *entry.get("artifacts", []))
+
+    def complete(self, stage, probed=False):
+        self.stages[stage.name] = {"time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                                   "artifacts": stage.artifacts, "probed": probed}
+        self._save()
+
+    def drop(self, stage):
+        if self.stages.pop(stage.name, None) is not None:
+            self._save()
+
+    def pending(self, stages):
+        # stages to run, in order
+        from ciadmin import probes
+        todo = []
+        for stage in stages:
+            if any(required in [pending.name for pending in todo] for required in stage.requires):
+                # runs again after a stage it depends on, e.g. a new account
+                self.drop(stage)
+                todo.append(stage)
+            elif self.is_done(stage):
+                print(f"=> {stage.name}: done in a previous run ({self.stages[stage.name]['time']}).")
+            elif stage.probe is not None and probes.skip(stage.name, stage.probe(self.project_name)):
+                self.complete(stage, probed=True)
+            else:
+                todo.append(stage)
+        return todo
+
+    def run(self, page, stages):
+        # runs the stages in one browser session, the pass items of a stage are committed before it is recorded
+        from ciadmin import passstore
+        for stage in stages:
+            print(f"=> Stage '{stage.name}'...")
+            with passstore.batch():
+                stage.run(page, self.project_name)
+            self.complete(stage)
+
+
+def reset(project_name, flow=None):
+    folder = os.path.join(CHECKPOINT_DIR, project_name)
+    if not os.path.isdir(folder):
+        return
+    for name in os.listdir(folder):
+        if name.endswith(".json") and (flow is None or name == flow + ".json"):
+            os.remove(os.path.join(folder, name))
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "show" and len(sys.argv) in (2, 3):
+        projects = [sys.argv[2]] if len(sys.argv) == 3 else sorted(os.listdir(CHECKPOINT_DIR)) if os.path.isdir(CHECKPOINT_DIR) else []
+        for project_name in projects:
+            folder = os.path.join(CHECKPOINT_DIR, project_name)
+            for name in sorted(os.listdir(folder)) if os.path.isdir(folder) else []:
+                with open(os.path.join(folder, name), 'r') as f:
+                    stages = json.load(f)["stages"]
+                print(f"{project_name} {name[:-5]}:")
+                for stage, entry in stages.items():
+                    print(f"  {stage:10} {entry['time']}{' (probed)' if entry.get('probed') else ''}"
+                          f"{'  ' + ', '.join(entry['artifacts']) if entry.get('artifacts') else ''}")
+    elif command == "reset" and len(sys.argv) in (3, 4):
+        reset(sys.argv[2], sys.argv[3] if len(sys.argv) == 4 else None)
+    else:
+        print("Usage: checkpoints.py show [PROJECT] | reset PROJECT [FLOW]", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import sys
+
+# Helpers shared by the command line entry points
+
+
+def parse_project_args():
+    # <project_name> [--fast]
+    fast = "--fast" in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg != "--fast"]
+
+    if len(args) < 1:
+        print("ERROR: project name must be set")
+        sys.exit(1)
+
+    project_name = args[0]
+    print("Project name: " + project_name)
+    return project_name, fast
+
+
+def pop_flag(flag):
+    # removes an optional flag from the arguments, returns True if it was given
+    if flag not in sys.argv[1:]:
+        return False
+    sys.argv = [arg for arg in sys.argv if arg != flag]
+    return True
+
+
+def get_project_shortname(project_name):
+    return project_name.split(".")[-1]
+
+
+def ask_to_continue(message="Do you want to continue? (yes/no): ", verbose=True):
+    while True:
+        user_input = input(message).strip().lower()
+        if user_input in ['yes', 'y']:
+            if verbose:
+                print("Continuing...")
+            return True
+        elif user_input in ['no', 'n']:
+            if verbose:
+                print("Exiting...")
+            return False
+        else:
+            print("Please enter 'yes/y' or 'no/n'.")
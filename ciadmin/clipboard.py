@@ -0,0 +1,9 @@
+from ciadmin import tracing
+
+# Clipboard access for the token flows. pyperclip is imported on first use and spawns xclip/xsel/wl-paste.
+
+
+def paste():
+    import pyperclip
+    with tracing.external("clipboard paste"):
+        return pyperclip.paste()
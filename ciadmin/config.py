@@ -0,0 +1,224 @@
+import json
+import os
+import re
+import sys
+
+# Access to the local config ("~/.cbi/config"). The file is parsed on first use and parsed again only if its
+# modification time changed. Known entries are described in SCHEMA (type, default value and if it is a secret).
+# get() returns the default of a known entry whose value has the wrong type, and reports it.
+#
+# The shell scripts get the known values with one call instead of one jq call per value:
+#   eval "$(python3 ciadmin/config.py export)"
+# (or utils/local_config.sh export_vars) exports CBI_CONFIG_<GROUP>_<NAME> variables (e.g. CBI_CONFIG_PASSWORD_STORE_CBI_DIR),
+# which utils/local_config.sh get_var returns without reading the file again. ci-adm does this once per run.
+# Secrets, unknown entries and entries whose variable name is shared with another entry are not exported, get_var
+# reads them from the file.
+#
+# Usage:
+#   python config.py get <NAME> [GROUP]
+#   python config.py export
+#   python config.py check
+
+CONFIG_PATH = os.path.expanduser('~/.cbi/config')
+EXPORT_PREFIX = "CBI_CONFIG_"
+
+# (group, name) or (name,) -> (type, default, secret)
+SCHEMA = {
+    ("jiro-root-dir",): (str, None, False),
+    ("projects-bots-api-root-dir",): (str, None, False),
+    ("cbi-sponsorships-api-root-dir",): (str, None, False),
+    ("grac-root-dir",): (str, None, False),
+    ("otterdog-configs-root-dir",): (str, None, False),
+    ("gitlab-token",): (str, None, True),
+    ("matrix-token",): (str, None, True),
+    ("sonar-token",): (str, None, True),
+    ("jenkins_login", "user"): (str, None, False),
+    ("jenkins_login", "pw"): (str, None, True),
+    ("github", "access_token"): (str, None, True),
+    ("password-store", "cbi-dir"): (str, None, False),
+    ("password-store", "it-dir"): (str, None, False),
+    ("playwright", "session-ttl"): (int, 0, False),
+    ("playwright", "probe-ttl"): (int, 0, False),
+    ("backend_server", "server"): (str, None, False),
+    ("backend_server", "user"): (str, None, False),
+    ("backend_server", "pw"): (str, None, True),
+    ("backend_server", "pw_root"): (str, None, True),
+    ("file_server", "server"): (str, None, False),
+    ("file_server", "user"): (str, None, False),
+    ("file_server", "pw"): (str, None, True),
+    ("file_server", "pw_root"): (str, None, True),
+    ("file_server", "pw_ldap"): (str, None, True),
+    ("db_server", "server"): (str, None, False),
+    ("db_server", "user"): (str, None, False),
+    ("db_server", "mysql_user"): (str, None, False),
+    ("db_server", "mysql_pw"): (str, None, True),
+}
+
+_config = None
+_mtime = None
+# entries with a value of the wrong type that get() reported already
+_reported = set()
+
+
+def load():
+    global _config, _mtime
+    try:
+        mtime = os.stat(CONFIG_PATH).st_mtime_ns
+    except OSError:
+        # no config file: only the defaults (or values set with override()) are available
+        if _config is None:
+            _config = {}
+        return _config
+    if _config is None or (_mtime is not None and mtime != _mtime):
+        with open(CONFIG_PATH, 'r') as config_file:
+            _config = json.load(config_file)
+        _mtime = mtime
+    return _config
+
+
+def override(values):
+    # uses the given values instead of the config file (offline benchmarks)
+    global _config, _mtime
+    _config = values
+    _mtime = None
+
+
+def _lookup(config, keys):
+    value = config
+    for key in keys:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def _type_error(keys, value):
+    # problem with the type of a known entry, None if the value can be used
+    value_type = SCHEMA[keys][0] if keys in SCHEMA else None
+    if value is None or value_type is None:
+        return None
+    # bool is an int in Python, not in the config
+    if not isinstance(value, value_type) or (isinstance(value, bool) and value_type is not bool):
+        return f"'{'/'.join(keys)}' must be of type {value_type.__name__}, got {type(value).__name__}"
+    return None
+
+
+def get(*keys, default=None):
+    value = _lookup(load(), keys)
+    error = _type_error(tuple(keys), value)
+    if error is not None:
+        # the callers rely on the type, the value is ignored
+        if tuple(keys) not in _reported:
+            _reported.add(tuple(keys))
+            print(f"ERROR: {error} in {CONFIG_PATH}, using the default.", file=sys.stderr)
+        value = None
+    if value is None:
+        if default is not None:
+            return default
+        return SCHEMA.get(tuple(keys), (None, None, False))[1]
+    return value
+
+
+def password_store_dir(store="cbi"):
+    store_dir = get('password-store', store + '-dir')
+    if not store_dir:
+        return None
+    return os.path.expanduser(store_dir)
+
+
+def validate(config=None):
+    # list of problems with the known entries, unknown entries are allowed
+    config = load() if config is None else config
+    if not isinstance(config, dict):
+        return ["the config must be a JSON object"]
+    errors = []
+    for keys in SCHEMA:
+        error = _type_error(keys, _lookup(config, keys))
+        if error is not None:
+            errors.append(error)
+    for group in {keys[0] for keys in SCHEMA if len(keys) == 2}:
+        if group in config and not isinstance(config[group], dict):
+            errors.append(f"'{group}' must be an object")
+    for variable, entries in sorted(_variables(config).items()):
+        if len(entries) > 1:
+            errors.append(f"{', '.join(repr(entry) for entry in entries)} have the same variable name {variable}")
+    return errors
+
+
+def variable_name(name, group=None):
+    # same naming as get_var in utils/local_config.sh
+    return EXPORT_PREFIX + re.sub("[^A-Za-z0-9]", "_", (group + "_" + name) if group else name).upper()
+
+
+def _variables(config):
+    # variable -> ['group/name' or 'name'] of the schema entries and the entries of the config (top level and one
+    # level of groups), more than one entry is a collision (e.g. 'github/access_token' and 'github-access-token')
+    keys = set(SCHEMA)
+    for name, value in config.items():
+        if isinstance(value, dict):
+            keys.update((name, key) for key in value)
+        else:
+            keys.add((name,))
+    variables = {}
+    for entry in keys:
+        variables.setdefault(variable_name(entry[-1], entry[0] if len(entry) == 2 else None), []).append("/".join(entry))
+    return {variable: sorted(entries) for variable, entries in variables.items()}
+
+
+def exports():
+    # (variable, value) for the known entries that are not secrets, with their config value or default, entries
+    # with a value of the wrong type are not exported
+    config = load()
+    variables = _variables(config)
+    values = {}
+    for keys, (value_type, default, secret) in SCHEMA.items():
+        variable = variable_name(keys[-1], keys[0] if len(keys) == 2 else None)
+        value = _lookup(config, keys)
+        if _type_error(keys, value) is not None:
+            continue
+        value = default if value is None else value
+        if secret or value is None or isinstance(value, (dict, list)) or len(variables[variable]) > 1:
+            continue
+        values[variable] = value
+    return sorted(values.items())
+
+
+def _shell_value(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "get" and len(sys.argv) in (3, 4):
+        name = sys.argv[2]
+        group = sys.argv[3] if len(sys.argv) == 4 else None
+        value = get(group, name) if group else get(name)
+        if value is None or value == "":
+            print(f"ERROR: '{group + '/' if group else ''}{name}' must be set in {CONFIG_PATH}.", file=sys.stderr)
+            sys.exit(1)
+        print(_shell_value(value))
+    elif command == "export":
+        import shlex
+        if not os.path.isfile(CONFIG_PATH):
+            print(f"ERROR: File '{CONFIG_PATH}' does not exist", file=sys.stderr)
+            sys.exit(1)
+        for error in validate():
+            print("WARNING: " + error, file=sys.stderr)
+        for variable, value in exports():
+            print(f"export {variable}={shlex.quote(_shell_value(value))}")
+    elif command == "check":
+        errors = validate()
+        for error in errors:
+            print("ERROR: " + error)
+        if errors:
+            sys.exit(1)
+        print(f"{CONFIG_PATH} is valid.")
+    else:
+        print("Usage: config.py get <NAME> [GROUP] | export | check", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
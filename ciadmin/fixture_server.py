@@ -0,0 +1,385 @@
+import argparse
+import html
+import json
+import os
+import random
+import secrets
+import string
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from ciadmin import totp
+
+# Local stand-in for the sites driven by the Playwright scripts (GitHub, Central, PyPI, npm), used by ciadmin/bench.py.
+# Requests are expected as /<site>/<path>, e.g. /github.com/login, the bench maps the real URLs onto them.
+# Browser contexts are told apart by the X-Fixture-Session header.
+#
+# Usage:
+#   python fixture_server.py [--port PORT] [--latency MS] [--jitter MS] [--failure-rate RATE]
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SESSION_HEADER = "X-Fixture-Session"
+# every fixture account uses the same 2FA seed and password
+TOTP_SEED = "JBSWY3DPEHPK3PXPJBSWY3DPEHPK3PXP"
+PASSWORD = "fixture-password"
+
+_DEFAULT_PORT = 8900
+
+
+def _page(site, name, **values):
+    with open(os.path.join(FIXTURES_DIR, site, name + ".html"), 'r') as f:
+        return string.Template(f.read()).safe_substitute(values)
+
+
+class State:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.accounts = {}
+
+    def session(self, site, session_id):
+        return self.sessions.setdefault((site, session_id), {"user": None, "pending_user": None})
+
+    def account(self, site, user):
+        if (site, user) not in self.accounts:
+            # new Central accounts own two namespaces without SNAPSHOTs
+            namespaces = {"org.eclipse." + user: False, "io.github." + user: False}
+            self.accounts[(site, user)] = {"tokens": {}, "namespaces": namespaces}
+        return self.accounts[(site, user)]
+
+
+def _valid_otp(code):
+    generator = totp.Totp(TOTP_SEED)
+    now = time.time()
+    # accept the previous code as well, like the real sites do
+    return code in (generator.code(now), generator.code(now - generator.period))
+
+
+def _redirect(location):
+    return 303, location, ""
+
+
+def _ok(body):
+    return 200, None, body
+
+
+def _json(data):
+    return 200, None, json.dumps(data), "application/json"
+
+
+class Request:
+    def __init__(self, state, site, session_id, method, path, query, form):
+        self.state = state
+        self.site = site
+        self.session = state.session(site, session_id)
+        self.method = method
+        self.path = path
+        self.query = query
+        self.form = form
+
+    def param(self, name, default=""):
+        values = self.form.get(name) or self.query.get(name)
+        return values[0] if values else default
+
+    @property
+    def user(self):
+        return self.session["user"]
+
+    @property
+    def account(self):
+        return self.state.account(self.site, self.user)
+
+
+def _login(request, next_page):
+    # first step of a password + 2FA login, the user is only logged in after the 2FA step
+    if request.param("password") != PASSWORD or request.param("login") == "":
+        return None
+    request.session["pending_user"] = request.param("login")
+    return _redirect(next_page)
+
+
+def _verify_otp(request, next_page, otp_page):
+    if request.session["pending_user"] is None:
+        return None
+    if not _valid_otp(request.param("otp")):
+        return _redirect(otp_page + "?error=1")
+    request.session["user"] = request.session["pending_user"]
+    request.session["pending_user"] = None
+    return _redirect(next_page)
+
+
+def _logout(request, next_page):
+    request.session["user"] = None
+    request.session["pending_user"] = None
+    return _redirect(next_page)
+
+
+# GitHub
+
+def github_page(request, name, **values):
+    header = _page("github.com", "_header", user=html.escape(request.user or ""))
+    return _ok(_page("github.com", name, header=header, **values))
+
+
+def github(request):
+    if request.path == "/login":
+        return github_page(request, "login", error="Incorrect username or password." if "error" in request.query else "")
+    if request.path == "/session" and request.method == "POST":
+        return _login(request, "/sessions/two-factor/app") or _redirect("/login?error=1")
+    if request.path == "/sessions/two-factor/app":
+        if request.session["pending_user"] is None:
+            return _redirect("/login")
+        return github_page(request, "two_factor")
+    if request.path == "/sessions/two-factor" and request.method == "POST":
+        return _verify_otp(request, "/", "/sessions/two-factor/app") or _redirect("/login")
+
+    if request.user is None:
+        return _redirect("/login")
+
+    if request.path == "/":
+        return github_page(request, "home")
+    if request.path == "/settings/profile":
+        return github_page(request, "settings")
+    if request.path == "/settings/apps":
+        return github_page(request, "developer_settings")
+    if request.path == "/settings/tokens" and request.method == "POST":
+        note = request.param("note")
+        request.account["tokens"][note] = "ghp_" + secrets.token_hex(18)
+        return _redirect("/settings/tokens?new=" + note)
+    if request.path == "/settings/tokens":
+        tokens = request.account["tokens"]
+        token_list = "\n".join(f'<li><a href="/settings/tokens">{html.escape(name)}</a></li>' for name in tokens)
+        new_token = ""
+        if request.param("new") in tokens:
+            new_token = _page("github.com", "_new_token", token=tokens[request.param("new")])
+        return github_page(request, "tokens", token_list=token_list, new_token=new_token)
+    if request.path == "/settings/tokens/new":
+        return github_page(request, "new_token")
+    if request.path == "/logout" and request.method == "POST":
+        return _logout(request, "/")
+    if request.path == "/logout":
+        return github_page(request, "logout")
+    return None
+
+
+# Central
+
+def central_page(request, name, **values):
+    header = _page("central.sonatype.com", "_header", user=html.escape(request.user or ""))
+    return _ok(_page("central.sonatype.com", name, header=header, **values))
+
+
+def central(request):
+    if request.path == "/api/auth/login" and request.method == "POST":
+        # Central has no 2FA for the bot accounts
+        if _login(request, "/") is None:
+            return _redirect("/api/auth/login?error=1")
+        request.session["user"] = request.session["pending_user"]
+        request.session["pending_user"] = None
+        return _redirect("/")
+    if request.path == "/api/auth/login":
+        return _ok(_page("central.sonatype.com", "login"))
+    if request.path == "/api/auth/logout":
+        return _logout(request, "/api/auth/login")
+
+    if request.user is None:
+        return _redirect("/api/auth/login")
+
+    if request.path == "/":
+        return central_page(request, "home")
+    if request.path == "/api/v1/usertoken" and request.method == "POST":
+        # like on Central, the token is created by a JSON API call of the user token page
+        name = request.param("name")
+        name_code, pass_code = secrets.token_hex(4), secrets.token_urlsafe(32)
+        request.account["tokens"][name] = (name_code, pass_code)
+        return _json({"name": name, "nameCode": name_code, "passCode": pass_code})
+    if request.path == "/usertoken":
+        token_list = "\n".join(f"<h3>{html.escape(name)}</h3>" for name in request.account["tokens"])
+        return central_page(request, "usertoken", token_list=token_list)
+    if request.path == "/publishing":
+        return central_page(request, "publishing")
+    # backend endpoints of the namespaces page
+    if request.path == "/api/internal/publisher/namespaces":
+        return _json([{"name": namespace, "snapshotsEnabled": enabled}
+                      for namespace, enabled in request.account["namespaces"].items()])
+    if request.path.startswith("/api/internal/publisher/namespaces/") and request.method == "POST":
+        namespace, _, action = request.path[len("/api/internal/publisher/namespaces/"):].partition("/")
+        if namespace not in request.account["namespaces"] or action != "snapshots/enable":
+            return None
+        request.account["namespaces"][namespace] = True
+        return _json({"name": namespace, "snapshotsEnabled": True})
+    if request.path == "/publishing/namespaces/snapshots" and request.method == "POST":
+        namespaces = request.account["namespaces"]
+        if request.param("namespace") in namespaces:
+            namespaces[request.param("namespace")] = True
+        return _redirect("/publishing/namespaces")
+    if request.path == "/publishing/namespaces":
+        items = []
+        for namespace, enabled in request.account["namespaces"].items():
+            items.append(_page("central.sonatype.com", "_namespace_item", namespace=namespace,
+                               snapshots="<div>SNAPSHOTs enabled</div>" if enabled else ""))
+        return central_page(request, "namespaces", namespace_items="\n".join(items))
+    return None
+
+
+# PyPI
+
+def pypi(request):
+    if request.path == "/account/login/" or request.path == "/account/login":
+        if request.method == "POST":
+            return _login(request, "/account/two-factor/") or _redirect("/account/login/?error=1")
+        return _ok(_page("pypi.org", "login"))
+    if request.path == "/account/two-factor/":
+        if request.method == "POST":
+            return _verify_otp(request, "/manage/projects/", "/account/two-factor/") or _redirect("/account/login/")
+        if request.session["pending_user"] is None:
+            return _redirect("/account/login/")
+        return _ok(_page("pypi.org", "two_factor"))
+    if request.path == "/account/logout/" and request.method == "POST":
+        return _logout(request, "/")
+    if request.path == "/":
+        return _ok(_page("pypi.org", "index"))
+
+    if request.user is None:
+        return _redirect("/account/login/")
+
+    if request.path == "/manage/projects/":
+        return _ok(_page("pypi.org", "projects", user=html.escape(request.user)))
+    if request.path == "/manage/account" or request.path == "/manage/account/":
+        return _ok(_page("pypi.org", "account", user=html.escape(request.user)))
+    return None
+
+
+# npm
+
+def npmjs(request):
+    if request.path == "/login" and request.method == "POST":
+        return _login(request, "/login/otp") or _redirect("/login?error=1")
+    if request.path == "/login":
+        return _ok(_page("npmjs.com", "login"))
+    if request.path == "/login/otp" and request.method == "POST":
+        return _verify_otp(request, "/", "/login/otp") or _redirect("/login")
+    if request.path == "/login/otp":
+        if request.session["pending_user"] is None:
+            return _redirect("/login")
+        return _ok(_page("npmjs.com", "otp"))
+    if request.path == "/logout":
+        return _logout(request, "/login")
+
+    if request.user is None:
+        return _redirect("/login")
+
+    if request.path == "/":
+        return _ok(_page("npmjs.com", "home", user=html.escape(request.user)))
+    return None
+
+
+SITES = {
+    "github.com": github,
+    "central.sonatype.com": central,
+    "pypi.org": pypi,
+    "npmjs.com": npmjs,
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def handle_request(self, method):
+        server = self.server
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        url = urlparse(self.path)
+        site, _, path = url.path.lstrip("/").partition("/")
+        form = {}
+        if method == "POST":
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length).decode()
+            if "json" in self.headers.get("Content-Type", ""):
+                form = {key: [str(value)] for key, value in json.loads(body or "{}").items()}
+            else:
+                form = parse_qs(body)
+
+        if site not in SITES:
+            self.respond(404, None, "unknown site")
+            return
+        # failure injection, e.g. to measure retries and error handling
+        if random.random() < server.failure_rate:
+            self.respond(503, None, "<html><body><h1>Service Unavailable</h1></body></html>")
+            return
+
+        with server.state.lock:
+            request = Request(server.state, site, self.headers.get(SESSION_HEADER, "default"), method,
+                              "/" + path, parse_qs(url.query), form)
+            response = SITES[site](request)
+        if response is None:
+            self.respond(404, None, "<html><body><h1>Not Found</h1></body></html>")
+        else:
+            self.respond(*response)
+
+    def respond(self, status, location, body, content_type="text/html; charset=utf-8"):
+        data = body.encode()
+        self.send_response(status)
+        if location is not None:
+            self.send_header("Location", location)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def create(port=0, latency=0, jitter=0, failure_rate=0.0, verbose=False):
+    server = ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+    server.daemon_threads = True
+    server.state = State()
+    server.latency = latency
+    server.jitter = jitter
+    server.failure_rate = failure_rate
+    server.verbose = verbose
+    server.url = "http://127.0.0.1:" + str(server.server_address[1])
+    return server
+
+
+def start(port=0, latency=0, jitter=0, failure_rate=0.0):
+    # runs the server in a background thread of the current process
+    server = create(port, latency, jitter, failure_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve local stand-ins for the sites used by the Playwright scripts.")
+    parser.add_argument("--port", type=int, default=_DEFAULT_PORT, help=f"port to listen on (default: {_DEFAULT_PORT})")
+    parser.add_argument("--latency", type=int, default=0, help="delay added to every response in ms")
+    parser.add_argument("--jitter", type=int, default=0, help="random extra delay of up to this many ms")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="fraction of requests answered with 503 (e.g. 0.05)")
+    args = parser.parse_args()
+
+    server = create(args.port, args.latency, args.jitter, args.failure_rate, verbose=True)
+    print("Serving fixtures on " + server.url + " (" + ", ".join(SITES) + ")")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
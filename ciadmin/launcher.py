@@ -0,0 +1,93 @@
+import json
+import os
+from urllib.parse import urlparse
+
+# Browser launch for the Playwright scripts. In fast mode the browser runs headless and images, fonts, media
+# as well as requests to hosts that are not allowed for the site (analytics, beacons, ...) are blocked.
+
+BLOCKED_RESOURCE_TYPES = ["image", "font", "media"]
+
+# written by ciadmin/browser_daemon.py while it is running
+DAEMON_STATE_FILE = os.path.expanduser('~/.cbi/browser-daemon.json')
+
+headless = False
+
+
+class HumanInteractionRequired(Exception):
+    pass
+
+
+def _daemon_endpoint(fast):
+    if not os.path.isfile(DAEMON_STATE_FILE):
+        return None
+    import urllib.request
+    try:
+        with open(DAEMON_STATE_FILE, 'r') as f:
+            url = json.load(f)["url"]
+        with urllib.request.urlopen(url + "/lease", timeout=1) as response:
+            lease = json.load(response)
+    except (OSError, ValueError, KeyError):
+        return None
+    # only use the daemon if it runs in the requested mode
+    if lease["headless"] != fast:
+        return None
+    return lease["ws_endpoint"]
+
+
+def launch(playwright, fast=False):
+    global headless
+    headless = fast
+    ws_endpoint = _daemon_endpoint(fast)
+    if ws_endpoint is not None:
+        from playwright.sync_api import Error
+        try:
+            browser = playwright.firefox.connect(ws_endpoint)
+            print("Connected to browser daemon.")
+            return browser
+        except Error as e:
+            print("Unable to connect to browser daemon (" + str(e) + "). Launching a local browser...")
+    return playwright.firefox.launch(headless=fast)
+
+
+def _is_allowed(host, allowed_hosts, blocked_hosts):
+    if host in blocked_hosts:
+        return False
+    # an allowed host also allows its subdomains
+    return any(host == allowed or host.endswith("." + allowed) for allowed in allowed_hosts)
+
+
+def new_context(browser, fast=False, allowed_hosts=(), blocked_hosts=()):
+    context = browser.new_context(no_viewport=True)
+    if fast:
+        def route_fast(route):
+            request = route.request
+            host = urlparse(request.url).hostname or ""
+            if request.resource_type in BLOCKED_RESOURCE_TYPES or not _is_allowed(host, allowed_hosts, blocked_hosts):
+                route.abort()
+            else:
+                route.continue_()
+
+        context.route("**/*", route_fast)
+    return context
+
+
+def require_human(step):
+    # called before steps that cannot be automated (captcha, device verification)
+    if headless:
+        raise HumanInteractionRequired(step)
+
+
+def run(playwright, flow, fast=False):
+    # runs flow(browser, fast) and starts over in headed mode if a step needs a human
+    browser = launch(playwright, fast)
+    try:
+        flow(browser, fast)
+    except HumanInteractionRequired as e:
+        if not fast:
+            raise
+        print("'" + str(e) + "' needs manual interaction. Restarting in headed mode...")
+        browser.close()
+        browser = launch(playwright, False)
+        flow(browser, False)
+    finally:
+        browser.close()
@@ -0,0 +1,179 @@
+import os
+import shutil
+import subprocess
+import tempfile
+
+from ciadmin import config, tracing
+
+# Thin wrapper around 'pass' that uses the CBI password store configured in the local config
+#
+# Inside a batch (with passstore.batch("...")), insert() only queues the secrets: they are encrypted with one gpg
+# process per recipient set and committed to the store in one git commit when the batch ends. If the batch ends
+# with an exception, nothing is written. checkpoint() writes the queued secrets right away, for secrets that must
+# not be lost anymore if the flow fails later (e.g. once 2FA is enabled on the site).
+#
+# When the credential broker (ciadmin/broker.py) is running, show() is answered from its cache and writes drop the
+# cached entries.
+
+_batch = None
+
+
+def store_dir():
+    return config.password_store_dir() or os.environ.get('PASSWORD_STORE_DIR', os.path.expanduser('~/.password-store'))
+
+
+def _env():
+    env = dict(os.environ)
+    env['PASSWORD_STORE_DIR'] = store_dir()
+    return env
+
+
+def show(path):
+    if _batch is not None and path in _batch.entries:
+        return _batch.entries[path] + "\n"
+    from ciadmin import broker
+    value = broker.get("cbi", path)
+    if value is not None:
+        return value
+    with tracing.external("pass show"):
+        return subprocess.run(["pass", path], stdout=subprocess.PIPE, text=True, env=_env()).stdout
+
+
+def insert(path, value):
+    if _batch is not None:
+        _batch.entries[path] = value
+        return
+    with tracing.external("pass insert"):
+        subprocess.run(["pass", "insert", "-m", path], input=value + "\n", text=True, check=True,
+                       stdout=subprocess.DEVNULL, env=_env())
+    _forget([path])
+
+
+def _forget(paths):
+    from ciadmin import broker
+    for path in paths:
+        broker.forget("cbi", path)
+
+
+def recipients(path):
+    # GPG recipients of a path of the store (also used for files kept outside of it, e.g. the stored sessions),
+    # like pass, the recipients are in the .gpg-id file of the closest parent folder
+    if os.environ.get("PASSWORD_STORE_KEY"):
+        return tuple(os.environ["PASSWORD_STORE_KEY"].split())
+    store = os.path.abspath(store_dir())
+    folder = os.path.dirname(os.path.join(store, path))
+    while True:
+        gpg_id_file = os.path.join(folder, ".gpg-id")
+        if os.path.isfile(gpg_id_file):
+            with open(gpg_id_file, 'r') as f:
+                return tuple(line.split("#", 1)[0].strip() for line in f if line.split("#", 1)[0].strip())
+        if folder == store or os.path.dirname(folder) == folder:
+            raise RuntimeError("no .gpg-id found for " + path)
+        folder = os.path.dirname(folder)
+
+
+def _encrypt(entries, recipients, work_dir):
+    # encrypts {path: value} with one gpg process, returns {path: encrypted file}
+    plain_files = {}
+    for i, (path, value) in enumerate(entries.items()):
+        plain_file = os.path.join(work_dir, str(i))
+        with open(os.open(plain_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'w') as f:
+            f.write(value + "\n")
+        plain_files[path] = plain_file
+
+    gpg = shutil.which("gpg2") or "gpg"
+    command = [gpg, "--encrypt", "--batch", "--quiet", "--yes", "--compress-algo=none", "--no-encrypt-to"]
+    command += os.environ.get("PASSWORD_STORE_GPG_OPTS", "").split()
+    for recipient in recipients:
+        command += ["--recipient", recipient]
+    command += ["--multifile"] + list(plain_files.values())
+    try:
+        with tracing.external("gpg encrypt"):
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+    finally:
+        for plain_file in plain_files.values():
+            os.remove(plain_file)
+    return {path: plain_file + ".gpg" for path, plain_file in plain_files.items()}
+
+
+class PassBatch:
+    def __init__(self, message=None):
+        self.message = message
+        self.entries = {}
+
+    def __enter__(self):
+        global _batch
+        if _batch is not None:
+            raise RuntimeError("pass batches cannot be nested")
+        _batch = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        global _batch
+        _batch = None
+        if exc_type is not None:
+            if self.entries:
+                print("Flow failed, the following secrets are NOT added to pass: " + ", ".join(sorted(self.entries)))
+            self.entries = {}
+            return False
+        self.apply()
+        return False
+
+    def apply(self):
+        # writes all queued secrets and commits them at once, the store is restored if anything fails
+        if not self.entries:
+            return
+        store = store_dir()
+        by_recipients = {}
+        for path, value in self.entries.items():
+            by_recipients.setdefault(recipients(path), {})[path] = value
+
+        work_dir = tempfile.mkdtemp(prefix="cbi-pass-", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+        backups = {}
+        try:
+            encrypted = {}
+            for gpg_ids, entries in by_recipients.items():
+                encrypted.update(_encrypt(entries, gpg_ids, work_dir))
+
+            for path, encrypted_file in encrypted.items():
+                target = os.path.join(store, path + ".gpg")
+                if os.path.isfile(target):
+                    backups[target] = os.path.join(work_dir, str(len(backups)) + ".bak")
+                    shutil.copy2(target, backups[target])
+                else:
+                    backups[target] = None
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(encrypted_file, target)
+
+            if os.path.isdir(os.path.join(store, ".git")):
+                files = [path + ".gpg" for path in sorted(self.entries)]
+                message = self.message or f"Add given passwords for {', '.join(sorted(self.entries))} to store."
+                with tracing.external("git commit"):
+                    subprocess.run(["git", "-C", store, "add", "--"] + files, check=True, stdout=subprocess.DEVNULL)
+                    subprocess.run(["git", "-C", store, "commit", "-m", message, "--"] + files, check=True,
+                                   stdout=subprocess.DEVNULL)
+        except BaseException:
+            for target, backup in backups.items():
+                if backup is None:
+                    if os.path.isfile(target):
+                        os.remove(target)
+                else:
+                    shutil.move(backup, target)
+            if os.path.isdir(os.path.join(store, ".git")):
+                subprocess.run(["git", "-C", store, "reset", "--quiet", "--"] + [target for target in backups],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            raise
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        _forget(self.entries)
+        print(f"Added {len(self.entries)} secret(s) to pass.")
+        self.entries = {}
+
+
+def batch(message=None):
+    return PassBatch(message)
+
+
+def checkpoint():
+    if _batch is not None:
+        _batch.apply()
@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+
+from ciadmin import config, passstore, tracing
+
+# Checks of the current state of a bot over HTTP and in the password store, before a browser is launched.
+# Every probe returns True (nothing to do), False (a change is needed) or None (unknown, e.g. no token or an
+# unexpected answer). Only True skips a UI step, so a failing probe costs a request, never a missed change.
+#
+# The GitHub probes use the REST API, with the bot's stored token where authentication is needed. Results that
+# cannot be read from an API (e.g. the SNAPSHOT state of Central namespaces) are remembered from the last UI run
+# in ~/.cbi/probes.json. They are only trusted if playwright/probe-ttl is set (seconds, 0 by default), since a
+# change made after that run (e.g. a new namespace) is not seen: keep it short, e.g. for reruns of a batch.
+#
+# Probes are disabled with CBI_PROBES=0, the scripts then always run every UI step.
+
+GITHUB_API = "https://api.github.com"
+CENTRAL_API = "https://central.sonatype.com/api/v1/publisher"
+STATE_FILE = os.path.expanduser('~/.cbi/probes.json')
+
+enabled = os.environ.get('CBI_PROBES', '') != '0'
+
+_TIMEOUT = 10
+_session = None
+_session_lock = threading.Lock()
+
+
+def _http():
+    # one pooled session per process, requests is only imported when a probe runs
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter, Retry
+            _session = requests.Session()
+            retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504])
+            _session.mount("https://", HTTPAdapter(max_retries=retries))
+        return _session
+
+
+def _get(url, headers=None, method="GET"):
+    # response, None if the site cannot be reached
+    import requests
+    try:
+        with tracing.external("probe " + url.split("/")[2]):
+            return _http().request(method, url, headers=headers, timeout=_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"Probe of {url} failed ({e}).")
+        return None
+
+
+def in_pass(driver, project_name, *items):
+    # True if all items are in the password store, nothing is decrypted
+    store_dir = passstore.store_dir()
+    return all(os.path.isfile(os.path.join(store_dir, driver.pass_path(project_name, item) + ".gpg")) for item in items)
+
+
+def written_after(driver, project_name, item, earlier_item):
+    # True if both items are in the password store and item was written last, nothing is decrypted
+    store_dir = passstore.store_dir()
+    try:
+        return (os.path.getmtime(os.path.join(store_dir, driver.pass_path(project_name, item) + ".gpg")) >=
+                os.path.getmtime(os.path.join(store_dir, driver.pass_path(project_name, earlier_item) + ".gpg")))
+    except OSError:
+        return False
+
+
+def stored(driver, project_name, item):
+    # decrypted pass item, None if it is not in the store
+    if not in_pass(driver, project_name, item):
+        return None
+    return driver.get_pass_creds(project_name, item).strip() or None
+
+
+def _github_headers(token=None):
+    headers = {"Accept": "application/vnd.github+json", "X-GitHub-Api-Version": "2022-11-28"}
+    if token:
+        headers["Authorization"] = "Bearer " + token
+    return headers
+
+
+def github_account_exists(username):
+    response = _get("https://github.com/" + username, method="HEAD")
+    if response is None:
+        return None
+    return response.status_code == 200
+
+
+def github_token_valid(token, username=None):
+    if not token:
+        return None
+    response = _get(GITHUB_API + "/user", _github_headers(token))
+    if response is None:
+        return None
+    if response.status_code == 401:
+        return False
+    if response.status_code != 200:
+        return None
+    # a token of another account is as good as no token
+    return username is None or response.json().get("login", "").lower() == username.lower()
+
+
+def github_ssh_key_added(username, public_key):
+    # the public keys of an account are public, the comment of the key is not part of the comparison
+    response = _get(f"{GITHUB_API}/users/{username}/keys", _github_headers())
+    if response is None or response.status_code != 200:
+        return None
+    key = " ".join(public_key.split()[:2])
+    return any(" ".join(entry.get("key", "").split()[:2]) == key for entry in response.json())
+
+
+def central_token_valid(token_username, token_password):
+    # any authenticated publisher API call tells if the user token is accepted
+    if not token_username or not token_password:
+        return None
+    import base64
+    bearer = base64.b64encode(f"{token_username}:{token_password}".encode()).decode()
+    response = _get(CENTRAL_API + "/published?namespace=org.eclipse&name=probe&version=0",
+                    {"Authorization": "Bearer " + bearer})
+    if response is None:
+        return None
+    if response.status_code == 401:
+        return False
+    # 403/404: the token is accepted, it has no access to the namespace used for the probe
+    if response.status_code in (200, 403, 404):
+        return True
+    return None
+
+
+def _load_state():
+    try:
+        with open(STATE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def remember(probe, project_name, value):
+    # records a state seen in the UI, for probes that have no API
+    if not enabled:
+        return
+    import fcntl
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    # batch scripts record from several processes
+    with open(STATE_FILE + ".lock", 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        state = _load_state()
+        state.setdefault(probe, {})[project_name] = {"value": value, "time": int(time.time())}
+        tmp_file = STATE_FILE + "." + str(os.getpid())
+        with open(tmp_file, 'w') as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, STATE_FILE)
+
+
+def recall(probe, project_name, ttl=None):
+    # value recorded with remember() in the last `ttl` seconds (default: playwright/probe-ttl of the local config),
+    # None if ttl is 0
+    ttl = config.get('playwright', 'probe-ttl') if ttl is None else ttl
+    if ttl <= 0:
+        return None
+    entry = _load_state().get(probe, {}).get(project_name)
+    if entry is None or time.time() - entry["time"] > ttl:
+        return None
+    return entry["value"]
+
+
+def skip(name, result):
+    # True if the step can be skipped, prints why
+    if not enabled or result is not True:
+        return False
+    print(f"=> {name}: nothing to do (probe).")
+    return True
@@ -0,0 +1,90 @@
+import json
+import os
+import subprocess
+import time
+
+from ciadmin import passstore, tracing
+
+# Stores Playwright storage states (cookies + local storage) per bot and site, encrypted with the
+# GPG recipient(s) of the password store, so that a recent login can be reused without password and 2FA.
+# A session expires `ttl` seconds after the login (saved_at), saving a reused session again keeps that time.
+
+SESSION_DIR = os.path.expanduser('~/.cbi/sessions')
+
+# (project, site) -> saved_at of the session returned by load()
+_loaded = {}
+
+
+def _session_file(project_name, site):
+    return os.path.join(SESSION_DIR, project_name, site + ".json.gpg")
+
+
+def load(project_name, site, ttl):
+    session_file = _session_file(project_name, site)
+    if not os.path.isfile(session_file):
+        return None
+    # saved_at is the age of the login, the file is written again at the end of every run but never before the
+    # login: an old file is an expired session without decrypting it
+    if time.time() - os.path.getmtime(session_file) > ttl:
+        print("Stored session has expired.")
+        invalidate(project_name, site)
+        return None
+
+    try:
+        with tracing.external("gpg decrypt session"):
+            plain = subprocess.check_output(["gpg", "--batch", "--quiet", "--decrypt", session_file])
+        session = json.loads(plain)
+        saved_at, state = int(session["saved_at"]), session["state"]
+    except (subprocess.CalledProcessError, ValueError, KeyError, TypeError) as e:
+        print("Unable to read stored session (" + str(e) + "). Ignoring it.")
+        invalidate(project_name, site)
+        return None
+    if time.time() - saved_at > ttl:
+        print("Stored session has expired.")
+        invalidate(project_name, site)
+        return None
+    _loaded[(project_name, site)] = saved_at
+    return state
+
+
+def restore(page, state):
+    # cookies and local storage of a stored state, like new_context(storage_state=...) for the context of the page
+    page.context.add_cookies(state["cookies"])
+
+    def blank(route):
+        route.fulfill(status=200, content_type="text/html", body="<html></html>")
+
+    # every origin is opened as an empty page (no request is sent) to write its local storage
+    for origin in state.get("origins", []):
+        if not origin.get("localStorage"):
+            continue
+        url = origin["origin"] + "/"
+        page.route(url, blank)
+        try:
+            page.goto(url)
+            page.evaluate("items => items.forEach(item => localStorage.setItem(item.name, item.value))",
+                          origin["localStorage"])
+        finally:
+            page.unroute(url, blank)
+
+
+def save(context, project_name, site):
+    session_file = _session_file(project_name, site)
+    os.makedirs(os.path.dirname(session_file), mode=0o700, exist_ok=True)
+
+    # a reused session keeps the time of its login
+    saved_at = _loaded.pop((project_name, site), int(time.time()))
+    payload = json.dumps({"saved_at": saved_at, "state": context.storage_state()})
+    cmd = ["gpg", "--batch", "--yes", "--quiet", "--encrypt", "--output", session_file + ".tmp"]
+    for recipient in passstore.recipients(f"bots/{project_name}/{site}/session"):
+        cmd += ["--recipient", recipient]
+    with tracing.external("gpg encrypt session"):
+        subprocess.run(cmd, input=payload.encode(), check=True)
+    os.replace(session_file + ".tmp", session_file)
+
+
+def invalidate(project_name, site):
+    _loaded.pop((project_name, site), None)
+    session_file = _session_file(project_name, site)
+    if os.path.isfile(session_file):
+        os.remove(session_file)
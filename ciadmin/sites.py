@@ -0,0 +1,53 @@
+from ciadmin import passstore, totp, tracing
+
+# Registry of the sites the Playwright scripts work with. Every site common module registers a driver
+# that knows where the bot credentials are stored and which hosts are needed in fast mode.
+
+_drivers = {}
+
+
+class Driver:
+    def __init__(self, site, allowed_hosts=(), blocked_hosts=()):
+        self.site = site
+        self.allowed_hosts = list(allowed_hosts)
+        self.blocked_hosts = list(blocked_hosts)
+        self._totp_generators = {}
+
+    def pass_path(self, project_name, item):
+        return "bots/" + project_name + "/" + self.site + "/" + item
+
+    def get_pass_creds(self, project_name, item):
+        return passstore.show(self.pass_path(project_name, item))
+
+    def add_to_pass(self, project_name, item, item_name):
+        passstore.insert(self.pass_path(project_name, item_name), item)
+
+    def get_totp(self, project_name):
+        # the 2FA seed is decrypted only once per run
+        if project_name not in self._totp_generators:
+            self._totp_generators[project_name] = totp.Totp(self.get_pass_creds(project_name, "2FA-seed"))
+        return self._totp_generators[project_name]
+
+    def get_pass_2fa_otp(self, project_name):
+        return self.get_totp(project_name).now(min_validity=3)
+
+    def new_context(self, browser, fast=False):
+        from ciadmin import launcher
+        context = launcher.new_context(browser, fast, self.allowed_hosts, self.blocked_hosts)
+        tracing.attach(context)
+        return context
+
+
+def register(driver):
+    _drivers[driver.site] = driver
+    return driver
+
+
+def get(site):
+    if site not in _drivers:
+        raise KeyError("no driver registered for site " + site)
+    return _drivers[site]
+
+
+def registered():
+    return sorted(_drivers)
@@ -0,0 +1,43 @@
+import base64
+import hashlib
+import hmac
+import struct
+import time
+
+# In-process TOTP (RFC 6238) generator, replaces calls to 'oathtool --totp -b <seed>'
+
+
+class Totp:
+    def __init__(self, seed, period=30, digits=6):
+        # seeds are base32, sometimes stored in groups separated by spaces
+        seed = "".join(seed.split()).upper()
+        seed += "=" * (-len(seed) % 8)
+        self.key = base64.b32decode(seed)
+        self.period = period
+        self.digits = digits
+
+    def code(self, at=None):
+        counter = int((time.time() if at is None else at) // self.period)
+        digest = hmac.new(self.key, struct.pack(">Q", counter), hashlib.sha1).digest()
+        offset = digest[-1] & 0x0F
+        value = struct.unpack(">I", digest[offset:offset + 4])[0] & 0x7FFFFFFF
+        return str(value % 10 ** self.digits).zfill(self.digits)
+
+    def remaining(self, at=None):
+        # remaining lifetime (in seconds) of the current time window
+        now = time.time() if at is None else at
+        return self.period - (now % self.period)
+
+    def now(self, min_validity=0):
+        # wait for the next window if the current code would expire before it can be used
+        if self.remaining() < min_validity:
+            time.sleep(self.remaining() + 0.05)
+        return self.code()
+
+    def next_code_after(self, previous):
+        # a code can only be used once, so wait until the window boundary if it is still the current one
+        current = self.code()
+        if current != previous:
+            return current
+        time.sleep(self.remaining() + 0.05)
+        return self.code()
@@ -0,0 +1,142 @@
+import functools
+import json
+import os
+import threading
+import time
+
+# Per-step tracing of the Playwright flows. Enabled with CBI_TRACE=1 (traces go to ~/.cbi/traces) or
+# CBI_TRACE=<directory>. Every span records its wall time as well as the navigations, bytes transferred
+# and subprocess time (pass, gpg, clipboard) that happened while it was open.
+#
+# Two files are written per process, as the spans end:
+#   <timestamp>-<pid>.trace.json  Chrome trace events, open with chrome://tracing or https://ui.perfetto.dev
+#   <timestamp>-<pid>.jsonl       one span per line
+#
+# When tracing is disabled, traced() returns the function unchanged and span() a shared no-op.
+
+_DEFAULT_TRACE_DIR = os.path.expanduser('~/.cbi/traces')
+
+_setting = os.environ.get('CBI_TRACE', '')
+enabled = _setting not in ('', '0')
+trace_dir = _DEFAULT_TRACE_DIR if _setting in ('', '0', '1') else os.path.expanduser(_setting)
+
+_counters = {"navigations": 0, "bytes": 0, "subprocess_ms": 0.0}
+_lock = threading.Lock()
+_local = threading.local()
+_files = None
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def _open_files():
+    global _files
+    os.makedirs(trace_dir, exist_ok=True)
+    prefix = os.path.join(trace_dir, time.strftime("%Y%m%d-%H%M%S") + "-" + str(os.getpid()))
+    trace_file = open(prefix + ".trace.json", 'w')
+    # the JSON array format of Chrome traces does not need the closing bracket, so the file stays valid
+    # even if the process does not exit cleanly
+    trace_file.write("[\n")
+    _files = (trace_file, open(prefix + ".jsonl", 'w'))
+    print("Tracing to " + prefix + ".trace.json")
+
+
+def _write(event, record):
+    with _lock:
+        if _files is None:
+            _open_files()
+        trace_file, jsonl_file = _files
+        trace_file.write(json.dumps(event) + ",\n")
+        trace_file.flush()
+        jsonl_file.write(json.dumps(record) + "\n")
+        jsonl_file.flush()
+
+
+class Span:
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.depth = getattr(_local, 'depth', 0)
+        _local.depth = self.depth + 1
+        self.counters = dict(_counters)
+        self.timestamp_us = time.time_ns() // 1000
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_us = (time.perf_counter_ns() - self.start) // 1000
+        _local.depth = self.depth
+        if self.category == "subprocess":
+            _counters["subprocess_ms"] += duration_us / 1000
+
+        args = dict(self.args)
+        args["navigations"] = _counters["navigations"] - self.counters["navigations"]
+        args["bytes"] = _counters["bytes"] - self.counters["bytes"]
+        args["subprocess_ms"] = round(_counters["subprocess_ms"] - self.counters["subprocess_ms"], 1)
+        if exc_type is not None:
+            args["error"] = exc_type.__name__
+
+        pid, tid = os.getpid(), threading.get_ident()
+        event = {"name": self.name, "cat": self.category, "ph": "X", "ts": self.timestamp_us, "dur": duration_us,
+                 "pid": pid, "tid": tid, "args": args}
+        record = dict(args, name=self.name, category=self.category, start=self.timestamp_us / 1000000,
+                      wall_ms=round(duration_us / 1000, 1), depth=self.depth, pid=pid, tid=tid)
+        _write(event, record)
+        return False
+
+
+def span(name, category="step", **args):
+    if not enabled:
+        return _NO_SPAN
+    return Span(name, category, args)
+
+
+def external(name):
+    # span around a call to an external process, its time is also added to the enclosing spans
+    if not enabled:
+        return _NO_SPAN
+    return Span(name, "subprocess", {})
+
+
+def traced(function):
+    if not enabled:
+        return function
+
+    name = function.__module__ + "." + function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with Span(name, "step", {}):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+def attach(context):
+    # counts main frame navigations and response bytes of a browser context
+    if not enabled:
+        return
+
+    def on_response(response):
+        length = response.headers.get("content-length", "")
+        if length.isdigit():
+            _counters["bytes"] += int(length)
+
+    def on_page(page):
+        def on_navigation(frame):
+            if frame == page.main_frame:
+                _counters["navigations"] += 1
+        page.on("framenavigated", on_navigation)
+
+    context.on("response", on_response)
+    context.on("page", on_page)
@@ -0,0 +1,102 @@
+import os
+import time
+
+# Event-driven waits with a time budget (in ms) instead of fixed page.wait_for_timeout() calls.
+# Every wait is recorded with the time it actually took, see report().
+
+timings = []
+
+
+def _timeout_error():
+    # playwright is imported on first use to keep the import of this module cheap
+    from playwright.sync_api import TimeoutError
+    return TimeoutError
+
+
+def _record(name, start, ok):
+    timings.append((name, int((time.monotonic() - start) * 1000), ok))
+    return ok
+
+
+def for_locator(locator, budget=5000, state="visible", name="locator"):
+    start = time.monotonic()
+    try:
+        locator.wait_for(state=state, timeout=budget)
+        ok = True
+    except _timeout_error():
+        ok = False
+    return _record(name, start, ok)
+
+
+def for_any(locators, budget=5000, name="any locator"):
+    # waits until one of the given locators is visible and returns its index (or None)
+    start = time.monotonic()
+    combined = locators[0]
+    for locator in locators[1:]:
+        combined = combined.or_(locator)
+    try:
+        combined.first.wait_for(state="visible", timeout=budget)
+    except _timeout_error():
+        _record(name, start, False)
+        return None
+    _record(name, start, True)
+    for i, locator in enumerate(locators):
+        if locator.first.is_visible():
+            return i
+    return None
+
+
+def for_url_change(page, old_url, budget=10000, name="url change"):
+    start = time.monotonic()
+    try:
+        page.wait_for_url(lambda url: url != old_url, timeout=budget)
+        ok = True
+    except _timeout_error():
+        ok = False
+    return _record(name, start, ok)
+
+
+def for_checked(locator, checked=True, budget=5000, name="checked"):
+    from playwright.sync_api import expect
+    start = time.monotonic()
+    try:
+        expect(locator).to_be_checked(checked=checked, timeout=budget)
+        ok = True
+    except AssertionError:
+        ok = False
+    return _record(name, start, ok)
+
+
+def for_enabled(locator, budget=5000, name="enabled"):
+    from playwright.sync_api import expect
+    start = time.monotonic()
+    try:
+        expect(locator).to_be_enabled(timeout=budget)
+        ok = True
+    except AssertionError:
+        ok = False
+    return _record(name, start, ok)
+
+
+def for_response(page, url_or_predicate, action, budget=10000, name="response"):
+    # runs the action and waits for the matching (XHR) response, returns it (or None)
+    start = time.monotonic()
+    try:
+        with page.expect_response(url_or_predicate, timeout=budget) as response_info:
+            action()
+        response = response_info.value
+    except _timeout_error():
+        response = None
+    _record(name, start, response is not None)
+    return response
+
+
+def report():
+    # set CBI_WAIT_REPORT=1 to print how long every wait took
+    if not os.environ.get("CBI_WAIT_REPORT") or not timings:
+        return
+    print("")
+    print("Waits:")
+    for name, elapsed, ok in timings:
+        print("  %-40s %6d ms %s" % (name, elapsed, "" if ok else "(budget exceeded)"))
+    print("  %-40s %6d ms" % ("total", sum(elapsed for _, elapsed, _ in timings)))
@@ -1,51 +1,39 @@
 import os
-import subprocess
-import json
+import sys
 
-SITE = "github.com"
-LOGIN_PAGE = "https://" + SITE + "/login"
-
-config_path = os.path.expanduser('~/.cbi/config')
-with open(config_path, 'r') as config_file:
-    config = json.load(config_file)
-
-password_store_dir = config.get('password-store', {}).get('cbi-dir')
-if password_store_dir:
-    os.environ['PASSWORD_STORE_DIR'] = password_store_dir
+# make the shared ciadmin package importable when the scripts are run from this folder
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")))
 
+from ciadmin import cli, config, launcher, session_store, sites, tracing, waits
 
-def get_pass_2fa_otp(project_name):
-    return os.popen("oathtool --totp -b $(pass bots/" + project_name + "/" + SITE + "/2FA-seed)").read()
-
+SITE = "github.com"
+LOGIN_PAGE = "https://" + SITE + "/login"
+HOME_PAGE = "https://" + SITE + "/"
+# redirects to the login page if the session is not valid (anymore)
+SESSION_PROBE_PAGE = "https://" + SITE + "/settings/profile"
+# personal access tokens (classic)
+TOKEN_SETTINGS_PAGE = "https://" + SITE + "/settings/tokens"
 
-def get_pass_creds(project_name, item):
-    return os.popen("pass bots/" + project_name + "/" + SITE + "/" + item).read()
+# hosts (and their subdomains) that are not blocked in fast mode
+ALLOWED_HOSTS = ["github.com", "githubassets.com"]
+BLOCKED_HOSTS = ["collector.github.com"]
 
+driver = sites.register(sites.Driver(SITE, ALLOWED_HOSTS, BLOCKED_HOSTS))
 
-def add_to_pass(project_name, item, item_name):
-    subprocess.check_output("echo \"" + item + "\" | pass insert -m bots/" + project_name + "/" + SITE + "/" + item_name, shell=True)
+get_pass_creds = driver.get_pass_creds
+add_to_pass = driver.add_to_pass
+get_totp = driver.get_totp
+get_pass_2fa_otp = driver.get_pass_2fa_otp
+get_project_shortname = cli.get_project_shortname
 
 
-def get_project_shortname(project_name):
-    # TODO: can this be simplified?
-    if project_name.find("."):
-        short_name = "".join(project_name.split(".")[-1:])
-    else:
-        short_name = "".join(project_name)
-    return short_name
+def ask_to_continue(message="Do you want to continue? (yes/no): "):
+    return cli.ask_to_continue(message, verbose=False)
 
 
-def ask_to_continue(message="Do you want to continue? (yes/no): "):
-    while True:
-        user_input = input(message).strip().lower()
-        if user_input in ['yes', 'y']:
-            #print("Continuing...")
-            return True
-        elif user_input in ['no', 'n']:
-            #print("Exiting...")
-            return False
-        else:
-            print("Please enter 'yes/y' or 'no/n'.")
+def session_ttl():
+    # reuse of authenticated sessions is disabled unless a TTL (in seconds) is configured
+    return config.get('playwright', 'session-ttl', default=0)
 
 
 def open_nav_menu(page):
@@ -60,7 +48,11 @@ def open_settings(page):
         page.get_by_label("Settings", exact=True).click()
 
 
+@tracing.traced
 def nav_to_token_settings(page):
+    # a token flow ends on the token list, the next token flow of the same session starts there
+    if page.url.split("?")[0].rstrip("/") == TOKEN_SETTINGS_PAGE:
+        return
     open_settings(page)
     # navigate to token settings
     page.get_by_role("link", name="Developer settings").click()
@@ -68,14 +60,56 @@ def nav_to_token_settings(page):
     page.get_by_role("link", name="Tokens (classic)").click()
 
 
-def signout(page):
+@tracing.traced
+def signout(page, project_name=None):
     open_nav_menu(page)
     page.get_by_role("link", name="Sign out").click()
     page.get_by_role("button", name="Sign out from all accounts", exact=True).click()
+    # signing out from all accounts invalidates the session on the server side
+    if project_name is not None:
+        session_store.invalidate(project_name, SITE)
+
+
+@tracing.traced
+def restore_session(page, project_name):
+    if not session_ttl():
+        return False
+
+    state = session_store.load(project_name, SITE, session_ttl())
+    if state is None:
+        return False
+
+    session_store.restore(page, state)
+    response = page.goto(SESSION_PROBE_PAGE)
+    if response is not None and response.ok and not page.url.startswith(LOGIN_PAGE):
+        print("Reusing stored session.")
+        page.goto(HOME_PAGE)
+        return True
+
+    print("Stored session is not valid anymore.")
+    session_store.invalidate(project_name, SITE)
+    page.context.clear_cookies()
+    page.evaluate("localStorage.clear()")
+    return False
+
+
+@tracing.traced
+def end_session(page, project_name):
+    # keep the session for the next run if session reuse is enabled, sign out otherwise
+    if session_ttl():
+        session_store.save(page.context, project_name, SITE)
+        print("Session has been stored for reuse.")
+    else:
+        signout(page, project_name)
 
 
+@tracing.traced
 def login(page, project_name, username, password):
-    response = page.goto(LOGIN_PAGE)
+    if restore_session(page, project_name):
+        return
+
+    with tracing.span("login page"):
+        response = page.goto(LOGIN_PAGE)
 
     assert response is not None
     if not response.ok:
@@ -94,48 +128,57 @@ def login(page, project_name, username, password):
     page.get_by_label("Password").click()
     page.get_by_label("Password").fill(password)
 
-    page.get_by_role("button", name="Sign in", exact=True).click()
-
-    if (page.get_by_role("heading", name="Device verification").is_visible()):
+    device_verification = page.get_by_role("heading", name="Device verification")
+    twofa_heading = page.get_by_role("heading", name="Two-factor authentication")
+    recovery_settings = page.get_by_text("Confirm your account recovery settings")
+    home_heading = page.get_by_role("heading", name="Home", exact=True)
+    with tracing.span("sign in"):
+        page.get_by_role("button", name="Sign in", exact=True).click()
+        waits.for_any([device_verification, twofa_heading, recovery_settings, home_heading], budget=10000,
+                      name="login: page after sign in")
+
+    twofa_token_pass = None
+    if (device_verification.is_visible()):
         print("Found device verification page.")
+        launcher.require_human("Device verification")
         # manual task
         print("Waiting for verification code...")
         # input('Press any key to continue\n')
         # TODO: wait for page element instead
-    elif (page.get_by_role("heading", name="Two-factor authentication").is_visible()):
+    elif (twofa_heading.is_visible()):
         print("Found token verification page.")
-        twofa_token_pass = get_pass_2fa_otp(project_name)
-        page.get_by_placeholder("XXXXXX").click()
-        page.get_by_placeholder("XXXXXX").fill(twofa_token_pass)
+        with tracing.span("2FA"):
+            twofa_url = page.url
+            twofa_token_pass = get_pass_2fa_otp(project_name)
+            page.get_by_placeholder("XXXXXX").click()
+            page.get_by_placeholder("XXXXXX").fill(twofa_token_pass)
+            waits.for_url_change(page, twofa_url, budget=10000, name="login: 2FA accepted")
+            waits.for_any([twofa_heading, recovery_settings, home_heading], budget=5000, name="login: page after 2FA")
     else:
         print("Device verification page not found or skipped.")
     
     # deal with confirm account settings page
-    if (page.get_by_text("Confirm your account recovery settings").is_visible()):
+    if (recovery_settings.is_visible()):
         print("Found account confirmation page.")
+        confirm_url = page.url
         page.get_by_role("button", name="Confirm").click()
+        waits.for_url_change(page, confirm_url, budget=5000, name="login: recovery settings confirmed")
+        waits.for_any([twofa_heading, home_heading], budget=5000, name="login: page after confirmation")
 
-    # add wait before continuing for secondary 2FA
-    page.wait_for_timeout(2000)
-
-    if (page.get_by_role("heading", name="Two-factor authentication").is_visible()):
+    if (twofa_heading.is_visible()):
         print("Found 2nd token verification page.")
-        print("Waiting for next 2FA token for 35 seconds...")
-        page.wait_for_timeout(10000)
-        print("Waiting for next 2FA token for 25 seconds...")
-        page.wait_for_timeout(10000)
-        print("Waiting for next 2FA token for 15 seconds...")
-        page.wait_for_timeout(10000)
-        print("Waiting for next 2FA token for  5 seconds...")
-        page.wait_for_timeout(5000)
-        twofa_token_pass = get_pass_2fa_otp(project_name)
-        page.get_by_role("button", name="Verify 2FA now").click()
-        #Page title "Verify your two-factor authentication (2FA) settings"
-        page.get_by_placeholder("XXXXXX").fill(twofa_token_pass)
-
-    page.wait_for_timeout(2000)
-    if (page.get_by_role("heading", name="2FA verification successful!").is_visible()):
-        page.get_by_role("link", name="Done").click()
-        print("Found '2FA verification successful!' page.")
+        with tracing.span("2nd 2FA"):
+            generator = get_totp(project_name)
+            if twofa_token_pass is not None and generator.code() == twofa_token_pass:
+                print("Waiting for next 2FA token for %d seconds..." % generator.remaining())
+            twofa_token_pass = generator.next_code_after(twofa_token_pass)
+            page.get_by_role("button", name="Verify 2FA now").click()
+            #Page title "Verify your two-factor authentication (2FA) settings"
+            page.get_by_placeholder("XXXXXX").fill(twofa_token_pass)
+
+            success_heading = page.get_by_role("heading", name="2FA verification successful!")
+            if waits.for_locator(success_heading, budget=5000, name="login: 2FA verification successful"):
+                page.get_by_role("link", name="Done").click()
+                print("Found '2FA verification successful!' page.")
 
     print("")
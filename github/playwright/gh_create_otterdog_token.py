@@ -1,10 +1,13 @@
 import sys
 import common
-import pyperclip
+from ciadmin import capture, cli, launcher, passstore, tracing, waits
 from playwright.sync_api import sync_playwright, Error, expect
 
 
-def setup_token(page, project_name):
+@tracing.traced
+def create_token(page, regenerate=None):
+    # returns the new token, None if the token exists and is kept
+    # regenerate: True/False to regenerate an existing token or keep it, None to ask
     common.nav_to_token_settings(page)
 
     # Check if token has already been added
@@ -12,7 +15,9 @@ def setup_token(page, project_name):
     token_name = "otterdog"
     if page.get_by_role("link", name=token_name).is_visible():
         print("Otterdog token has been added already")
-        if common.ask_to_continue("Do you want to regenerate it? (yes/no):"):
+        if regenerate is None:
+            regenerate = common.ask_to_continue("Do you want to regenerate it? (yes/no):")
+        if regenerate:
             print("Regenerate otterdog token")
     
             # token list page
@@ -23,10 +28,9 @@ def setup_token(page, project_name):
             page.get_by_role("button", name="30 days").click()
             page.get_by_role("menuitemradio", name="No expiration").click()
             page.get_by_role("button", name="Regenerate token").click()
-            page.get_by_role("button", name="Copy token").click()
 
         else:
-            return
+            return None
     else:
         print("Create otterdog token")
         page.get_by_role("button", name="Generate new token").click()
@@ -40,52 +44,62 @@ def setup_token(page, project_name):
         page.get_by_label("admin:org_hook\n        \n\n        \n          \n            Full control of organization hooks").check()
         page.get_by_label("delete_repo\n        \n\n        \n          \n            Delete repositories").check()
         page.get_by_role("button", name="Generate token").click()
-        page.get_by_role("button", name="Copy token").click()
 
     print("Register otterdog token")
-    otterdog_token = pyperclip.paste()
+    # the new token is shown once on the token page
+    otterdog_token = capture.text(page.locator("#new-oauth-token")) or capture.copied(page.get_by_role("button", name="Copy token"))
     print("Otterdog token: " + otterdog_token)
     if otterdog_token == "":
         print("ERROR: otterdog token is empty")
         sys.exit(1)
+    return otterdog_token
+
+
+@tracing.traced
+def setup_token(page, project_name):
+    otterdog_token = create_token(page)
+    if otterdog_token is None:
+        return
 
     # add token to pass
     common.add_to_pass(project_name, otterdog_token, "otterdog-token")
 
 
-def main():
-    _DEFAULT_TIMEOUT = 10000
+_DEFAULT_TIMEOUT = 10000
 
-    if len(sys.argv) < 2:
-        print("ERROR: project name must be set")
-        sys.exit(1)
-    else:
-        project_name = sys.argv[1]
-        print("Project name: " + project_name)
 
-    print("opening browser window")
-    with sync_playwright() as playwright:
-        browser = playwright.firefox.launch(headless=False)
-        context = browser.new_context(no_viewport=True)
+@tracing.traced
+def run(browser, project_name, fast):
+    context = common.driver.new_context(browser, fast)
 
-        page = context.new_page()
-        page.set_default_timeout(_DEFAULT_TIMEOUT)
+    page = context.new_page()
+    page.set_default_timeout(_DEFAULT_TIMEOUT)
 
-        username = common.get_pass_creds(project_name, "username")
-        password = common.get_pass_creds(project_name, "password")
+    username = common.get_pass_creds(project_name, "username")
+    password = common.get_pass_creds(project_name, "password")
 
-        common.login(page, project_name, username, password)
+    common.login(page, project_name, username, password)
 
-        expect(page.get_by_role("heading", name="Home", exact=True)).to_be_visible(timeout=30000)
+    expect(page.get_by_role("heading", name="Home", exact=True)).to_be_visible(timeout=30000)
 
+    # the secrets of the token are written (and committed) together once the token is set up
+    with passstore.batch():
         setup_token(page, project_name)
 
-        # input('Press any key to continue\n')
-        common.signout(page)
+    # input('Press any key to continue\n')
+    common.end_session(page, project_name)
+
+    page.close()
+    context.close()
 
-        page.close()
-        context.close()
-        browser.close()
+
+def main():
+    project_name, fast = cli.parse_project_args()
+
+    print("opening browser window")
+    with sync_playwright() as playwright:
+        launcher.run(playwright, lambda browser, fast: run(browser, project_name, fast), fast)
+    waits.report()
 
 
 if __name__ == "__main__":
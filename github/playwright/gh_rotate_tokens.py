@@ -0,0 +1,286 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import queue
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import common
+from ciadmin import passstore
+
+# Non-interactive rotation of the GitHub tokens (otterdog, renovate) of many bots.
+#
+# The policy decides which tokens are set up, using only the password store (no decryption, no login):
+#   create-missing              tokens that are not in pass yet
+#   regenerate-all              every token
+#   regenerate-older-than DAYS  tokens not in pass or last written to pass more than DAYS ago (pass git log)
+# Bots without anything to do are not logged in. The others are handled by a bounded pool of worker processes,
+# each with its own browser and one authenticated context per bot. A token that already exists on GitHub is
+# regenerated, since its value cannot be read again. The new tokens are written to pass by this process, one
+# commit per bot, as soon as a bot is done. Bots that need a human (device verification) are reported and skipped.
+#
+# Usage:
+#   python gh_rotate_tokens.py --policy create-missing [--kind otterdog] [-j 4] [--fast] PROJECT ...
+#   python gh_rotate_tokens.py --policy regenerate-older-than --days 180 --all-bots [--dry-run] [--json]
+#   python gh_rotate_tokens.py --policy regenerate-all -f projects.txt
+
+KINDS = {
+    "otterdog": "gh_create_otterdog_token",
+    "renovate": "gh_create_renovate_token",
+}
+POLICIES = ["create-missing", "regenerate-all", "regenerate-older-than"]
+
+_DEFAULT_JOBS = 4
+_DEFAULT_TIMEOUT = 10000
+_LOGIN_TIMEOUT = 30000
+
+
+def token_item(kind):
+    return kind + "-token"
+
+
+def token_ages(store_dir, kinds):
+    # (project, kind) -> seconds since the token was last written to pass, from one git log of the store
+    now = time.time()
+    ages = {}
+    items = {token_item(kind) + ".gpg": kind for kind in kinds}
+    if os.path.isdir(os.path.join(store_dir, ".git")):
+        pathspecs = [f"bots/*/{common.SITE}/{item}" for item in items]
+        log = subprocess.run(["git", "-C", store_dir, "log", "--format=%ct", "--name-only", "--"] + pathspecs,
+                             stdout=subprocess.PIPE, text=True, check=True).stdout
+        timestamp = None
+        for line in log.splitlines():
+            if line.isdigit():
+                timestamp = int(line)
+            elif line:
+                parts = line.split("/")
+                if len(parts) == 4 and parts[3] in items:
+                    # the log is newest first, the first commit of a file is its last change
+                    ages.setdefault((parts[1], items[parts[3]]), now - timestamp)
+    return ages
+
+
+def plan(store_dir, projects, kinds, policy, max_age):
+    # project -> [kinds to set up]
+    ages = token_ages(store_dir, kinds) if policy == "regenerate-older-than" else {}
+    result = {}
+    for project in projects:
+        todo = []
+        for kind in kinds:
+            token_file = os.path.join(store_dir, common.driver.pass_path(project, token_item(kind)) + ".gpg")
+            in_pass = os.path.isfile(token_file)
+            if policy == "regenerate-all" or not in_pass:
+                todo.append(kind)
+            elif policy == "regenerate-older-than":
+                # without git history, the file modification time is the age of the token
+                age = ages.get((project, kind), time.time() - os.path.getmtime(token_file))
+                if age > max_age:
+                    todo.append(kind)
+        result[project] = todo
+    return result
+
+
+def rotate(browser, project_name, kinds, fast, tokens):
+    # logs in once and sets up the tokens of the given kinds in tokens (kind -> token, None if kept), the tokens
+    # that are done stay in there if a later kind fails
+    import importlib
+    from playwright.sync_api import expect
+    context = common.driver.new_context(browser, fast)
+    try:
+        page = context.new_page()
+        page.set_default_timeout(_DEFAULT_TIMEOUT)
+
+        username = common.get_pass_creds(project_name, "username")
+        password = common.get_pass_creds(project_name, "password")
+        common.login(page, project_name, username, password)
+        expect(page.get_by_role("heading", name="Home", exact=True)).to_be_visible(timeout=_LOGIN_TIMEOUT)
+
+        for kind in kinds:
+            tokens[kind] = importlib.import_module(KINDS[kind]).create_token(page, regenerate=True)
+
+        try:
+            common.end_session(page, project_name)
+        except Exception as e:
+            # the tokens are set up, the rotation does not fail because of the sign out
+            print(f"Unable to end the session ({e})")
+    finally:
+        context.close()
+
+
+def worker(project_queue, result_queue, fast, verbose):
+    from ciadmin import launcher
+    from playwright.sync_api import sync_playwright
+
+    # the output of parallel flows is interleaved, it is only shown with --verbose
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(sys.stderr if verbose else devnull), \
+            sync_playwright() as playwright:
+        browser = launcher.launch(playwright, fast)
+        try:
+            while True:
+                try:
+                    project_name, kinds = project_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                start = time.monotonic()
+                tokens = {}
+                try:
+                    rotate(browser, project_name, kinds, fast, tokens)
+                    result = {"status": "ok"}
+                except launcher.HumanInteractionRequired as e:
+                    result = {"status": "needs-human", "error": str(e)}
+                except (Exception, SystemExit) as e:
+                    result = {"status": "failed", "error": str(e) or type(e).__name__}
+                # tokens regenerated before a failure are stored as well, the old ones are revoked already
+                result["tokens"] = tokens
+                result["seconds"] = round(time.monotonic() - start, 1)
+                result_queue.put((project_name, kinds, result))
+        finally:
+            browser.close()
+
+
+def store_tokens(project_name, tokens):
+    # kind -> action, the tokens of a bot are committed together
+    actions = {}
+    with passstore.batch(f"Rotate GitHub tokens of {project_name}"):
+        for kind, token in tokens.items():
+            if token is None:
+                actions[kind] = "kept"
+                continue
+            common.add_to_pass(project_name, token, token_item(kind))
+            actions[kind] = "written"
+    return actions
+
+
+def run_all(todo, jobs, fast, verbose, log):
+    # project -> report entry, the tokens are written to pass while the other bots are still running
+    report = {}
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager:
+        project_queue = manager.Queue()
+        result_queue = manager.Queue()
+        for project_name, kinds in todo.items():
+            project_queue.put((project_name, kinds))
+
+        with ProcessPoolExecutor(max_workers=min(jobs, len(todo)), mp_context=context) as executor:
+            futures = [executor.submit(worker, project_queue, result_queue, fast, verbose)
+                       for _ in range(min(jobs, len(todo)))]
+            while len(report) < len(todo):
+                # checked before reading, a worker puts its last result before it is done
+                finished = all(future.done() for future in futures)
+                try:
+                    project_name, kinds, result = result_queue.get(timeout=1)
+                except queue.Empty:
+                    if finished:
+                        break
+                    continue
+
+                entry = {"kinds": kinds, "status": result["status"], "seconds": result["seconds"]}
+                if result["status"] != "ok":
+                    entry["error"] = result["error"]
+                if result["tokens"]:
+                    try:
+                        entry["actions"] = store_tokens(project_name, result["tokens"])
+                    except (OSError, RuntimeError, subprocess.CalledProcessError) as e:
+                        # the tokens are regenerated on GitHub already, they must be set up again
+                        entry["status"] = "failed"
+                        entry["error"] = "unable to write the tokens to pass: " + str(e)
+                report[project_name] = entry
+                print(f"{project_name}: {entry['status']} ({', '.join(kinds)}, {entry['seconds']} s)", file=log, flush=True)
+
+            for future in futures:
+                if future.exception() is not None:
+                    print("ERROR: worker failed: " + str(future.exception()), file=sys.stderr)
+
+    for project_name, kinds in todo.items():
+        if project_name not in report:
+            report[project_name] = {"kinds": kinds, "status": "failed", "error": "not processed"}
+    return report
+
+
+def read_projects(args, store_dir):
+    projects = list(args.projects)
+    if args.file:
+        with (sys.stdin if args.file == "-" else open(args.file, 'r')) as f:
+            projects += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if args.all_bots:
+        bots_dir = os.path.join(store_dir, "bots")
+        with os.scandir(bots_dir) as entries:
+            projects += [entry.name for entry in entries
+                         if entry.is_dir() and os.path.isdir(os.path.join(entry.path, common.SITE))]
+    # keeps the given order, without duplicates
+    return list(dict.fromkeys(projects))
+
+
+def print_report(plan_result, report):
+    print("")
+    print(f"  {'project':40} {'token':10} {'result':12} details")
+    for project_name, kinds in plan_result.items():
+        entry = report.get(project_name)
+        if entry is None:
+            for kind in kinds:
+                print(f"  {project_name:40} {kind:10} {'planned':12}")
+            if not kinds:
+                print(f"  {project_name:40} {'-':10} {'up-to-date':12}")
+            continue
+        for kind in kinds:
+            result = entry.get("actions", {}).get(kind, entry["status"])
+            print(f"  {project_name:40} {kind:10} {result:12} {entry.get('error', '')}")
+
+    statuses = [entry["status"] for entry in report.values()]
+    print("")
+    print(f"Bots: {len(plan_result)}, up to date: {sum(1 for kinds in plan_result.values() if not kinds)}, "
+          f"rotated: {statuses.count('ok')}, needs human: {statuses.count('needs-human')}, "
+          f"failed: {statuses.count('failed')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create or regenerate the GitHub tokens of many bots without prompts.")
+    parser.add_argument("projects", nargs="*", help="project names (e.g. technology.cbi)")
+    parser.add_argument("-f", "--file", help="file with one project name per line ('-' for stdin)")
+    parser.add_argument("--all-bots", action="store_true", help=f"all bots with a {common.SITE} folder in pass")
+    parser.add_argument("--policy", choices=POLICIES, required=True, help="which tokens are set up")
+    parser.add_argument("--days", type=int, help="maximum token age for regenerate-older-than")
+    parser.add_argument("--kind", action="append", choices=sorted(KINDS), default=[],
+                        help=f"token kind, can be given several times (default: {', '.join(KINDS)})")
+    parser.add_argument("-j", "--jobs", type=int, default=_DEFAULT_JOBS,
+                        help=f"number of bots handled at the same time (default: {_DEFAULT_JOBS})")
+    parser.add_argument("--fast", action="store_true", help="headless browsers, blocks resources that are not needed")
+    parser.add_argument("--dry-run", action="store_true", help="only show which tokens would be set up")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show the output of the browser flows (on stderr)")
+    args = parser.parse_args()
+
+    if args.policy == "regenerate-older-than" and args.days is None:
+        parser.error("--days is required with --policy regenerate-older-than")
+
+    store_dir = passstore.store_dir()
+    projects = read_projects(args, store_dir)
+    if not projects:
+        parser.error("no projects given")
+
+    kinds = args.kind or list(KINDS)
+    plan_result = plan(store_dir, projects, kinds, args.policy, (args.days or 0) * 86400)
+    todo = {project_name: project_kinds for project_name, project_kinds in plan_result.items() if project_kinds}
+    log = sys.stderr if args.json else sys.stdout
+    print(f"{len(todo)} of {len(projects)} bot(s) need new tokens (policy: {args.policy}).", file=log)
+
+    report = {}
+    if todo and not args.dry_run:
+        report = run_all(todo, max(1, args.jobs), args.fast, args.verbose, log)
+
+    if args.json:
+        print(json.dumps({"policy": args.policy, "plan": plan_result, "results": report}, indent=2))
+    else:
+        print_report(plan_result, report)
+
+    if any(entry["status"] != "ok" for entry in report.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
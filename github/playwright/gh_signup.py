@@ -1,15 +1,15 @@
 import sys
 import os
-import subprocess
-import requests
 import common
-import pyperclip
-import sshpubkeys
+from ciadmin import capture, checkpoints, cli, launcher, passstore, probes, totp, tracing, waits
 
 from playwright.sync_api import sync_playwright, Error, expect
 
 
+@tracing.traced
 def signup(page, username, password, email):
+    launcher.require_human("GitHub signup (captcha)")
+
     response = page.goto("https://github.com/signup")
 
     assert response is not None
@@ -28,9 +28,10 @@ def signup(page, username, password, email):
     for x in range(10):
         checkbox_name = "Receive occasional product"
         if page.get_by_role("checkbox", name=checkbox_name).is_visible():
-            page.wait_for_timeout(2000)
+            waits.for_enabled(page.get_by_role("button", name="Create account"), budget=2000, name="signup: form ready")
             page.get_by_role("checkbox", name=checkbox_name).uncheck()
-            page.wait_for_timeout(2000)
+            waits.for_checked(page.get_by_role("checkbox", name=checkbox_name), False, budget=2000,
+                              name="signup: checkbox unchecked")
             page.get_by_role("checkbox", name=checkbox_name).uncheck()
             page.get_by_role("button", name="Create account").click()
         else:
@@ -56,15 +57,17 @@ def signup(page, username, password, email):
         page.get_by_role("button", name="Sign in", exact=True).click()
 
     # 4. Skip personalization
-    if page.get_by_role("link", name="Skip personalization").is_visible():
-        page.get_by_role("link", name="Skip personalization").click()
+    skip_personalization = page.get_by_role("link", name="Skip personalization")
+    home_heading = page.get_by_role("heading", name="Home", exact=True)
+    waits.for_any([skip_personalization, home_heading], budget=10000, name="signup: page after sign in")
+    if skip_personalization.is_visible():
+        skip_personalization.click()
 
     # TODO:
     # expect(page.get_by_text("Dashboard")).to_be_visible(timeout=30000)
 
-    page.wait_for_timeout(2000)
-
 
+@tracing.traced
 def setup_2fa(page, project_name):
     print("Checking/adding 2FA...")
 
@@ -87,8 +90,9 @@ def setup_2fa(page, project_name):
     # get 2FA seed text
     # TODO: is there a simpler and more reliable way??
     expect(page.get_by_role("dialog", name="Your two-factor secret")).to_be_visible()
-    page.wait_for_timeout(2000)
-    twofa_seed = page.locator('xpath=//div[@data-target="two-factor-setup-verification.mashedSecret"]').all_inner_texts()
+    mashed_secret = page.locator('xpath=//div[@data-target="two-factor-setup-verification.mashedSecret"]')
+    waits.for_locator(mashed_secret.first, budget=5000, name="2FA: setup key shown")
+    twofa_seed = mashed_secret.all_inner_texts()
     twofa_seed = ' '.join(twofa_seed)
 
     if not twofa_seed:
@@ -104,10 +108,12 @@ def setup_2fa(page, project_name):
     # add 2FA seed to pass
     # os.popen("echo " + twofa_seed +" | pass insert bots/"+ project_name + "/github.com/2FA-seed").read()
     # os.popen("echo \"hello" + twofa_seed +"\"").read()
-    subprocess.check_output("echo \"" + twofa_seed + "\" | pass insert -m bots/" + project_name + "/github.com/2FA-seed", shell=True)
+    common.add_to_pass(project_name, twofa_seed, "2FA-seed")
+    # the seed is written before the OTP enables 2FA, the bot must never be left without it
+    passstore.checkpoint()
 
-    # get OTP from pass
-    twofa_token = os.popen("oathtool --totp -b " + twofa_seed).read()
+    # generate OTP from seed
+    twofa_token = totp.Totp(twofa_seed).now(min_validity=3)
     print("   2FA token: " + twofa_token)
 
     # enter OTP
@@ -125,7 +131,9 @@ def setup_2fa(page, project_name):
     # input('Press any key to continue\n')
 
     # add 2FA codes to pass
-    subprocess.check_output("echo \"" + twofa_codes + "\" | pass insert -m bots/" + project_name + "/github.com/2FA-recovery-codes", shell=True)
+    common.add_to_pass(project_name, twofa_codes, "2FA-recovery-codes")
+    # 2FA is enabled at this point, the recovery codes must be kept even if the signup fails later
+    passstore.checkpoint()
 
     # download recovery codes
     # FIXME
@@ -142,12 +150,14 @@ def setup_2fa(page, project_name):
     print("=> 2FA setup complete.\n")
 
 
+@tracing.traced
 def setup_ssh(page, project_name, ssh_pub_key, email):
     # navigate to SSH settings
     print("Checking/adding SSH key...")
     common.open_settings(page)
     page.get_by_role("link", name="SSH and GPG keys").click()
 
+    import sshpubkeys
     key_hash = sshpubkeys.SSHKey(ssh_pub_key).hash_sha256()
     print("SHA256: " + key_hash)
 
@@ -165,6 +175,7 @@ def setup_ssh(page, project_name, ssh_pub_key, email):
     page.get_by_role("button", name="Add SSH key").click()
     print("=> SSH key has been added.\n")
 
+@tracing.traced
 def setup_token(page, project_name):
     print("Checking/adding PAT...")
     short_name = common.get_project_shortname(project_name)
@@ -185,7 +196,6 @@ def setup_token(page, project_name):
             page.get_by_role("button", name="30 days").click()
             page.get_by_role("menuitemradio", name="No expiration").click()
             page.get_by_role("button", name="Regenerate token").click()
-            page.get_by_role("button", name="Copy token").click()
         else:
             print("")
             return
@@ -202,9 +212,9 @@ def setup_token(page, project_name):
         page.get_by_label("admin:repo_hook\n        \n\n        \n          \n            Full control of repository hooks").check()
         page.get_by_label("admin:org_hook\n        \n\n        \n          \n            Full control of organization hooks").check()
         page.get_by_role("button", name="Generate token").click()
-        page.get_by_role("button", name="Copy token").click()
 
-    api_token = pyperclip.paste()
+    # the new token is shown once on the token page
+    api_token = capture.text(page.locator("#new-oauth-token")) or capture.copied(page.get_by_role("button", name="Copy token"))
     print("API token: " + api_token)
     if not api_token:
         print("   ERROR: jenkins token is empty")
@@ -212,55 +222,102 @@ def setup_token(page, project_name):
 
     # add token to pass
     common.add_to_pass(project_name, api_token, "api-token")
+    # the previous token is invalid now
+    passstore.checkpoint()
     print("   Jenkins token has been created and added to pass.\n")
 
 
-def main():
-    _DEFAULT_TIMEOUT = 10000
+_DEFAULT_TIMEOUT = 10000
 
-    if len(sys.argv) < 2:
-        print("ERROR: project name must be set")
-        sys.exit(1)
-    else:
-        project_name = sys.argv[1]
-        print("Project name: " + project_name)
+FLOW = "github-signup"
 
-    print("opening browser window")
-    with sync_playwright() as playwright:
-        browser = playwright.firefox.launch(headless=False)
-        context = browser.new_context(no_viewport=True)
 
-        page = context.new_page()
-        page.set_default_timeout(_DEFAULT_TIMEOUT)
+@tracing.traced
+def open_account(page, project_name):
+    # signs up if the GitHub account does not exist yet, logs in otherwise
+    username = common.get_pass_creds(project_name, "username")
+    password = common.get_pass_creds(project_name, "password")
 
-        username = common.get_pass_creds(project_name, "username")
-        password = common.get_pass_creds(project_name, "password")
+    # an account that cannot be probed is not signed up again
+    if probes.github_account_exists(username.strip()) is not False:
+        print("User account exists, trying to login.")
+        common.login(page, project_name, username, password)
+    else:
+        print("User account does not exist, signing up.")
         email = common.get_pass_creds(project_name, "email")
-        ssh_pubkey = common.get_pass_creds(project_name, "id_rsa.pub")
-
-        # check if GH account has been set up or not
-        url = "https://github.com/" + username.strip()
-        r = requests.head(url)
-        print("Status Code for " + url + ": " + str(r.status_code))
-        if r.status_code == 200:
-            print("User account exists, trying to login.")
-            common.login(page, project_name, username, password)
-        else:
-            print("User account does not exist, signing up.")
-            signup(page, username, password, email)
+        signup(page, username, password, email)
+
+    expect(page.get_by_role("heading", name="Home", exact=True)).to_be_visible(timeout=30000)
+
+
+def _username(project_name):
+    return common.get_pass_creds(project_name, "username").strip()
+
+
+def _api_token(project_name):
+    return probes.stored(common.driver, project_name, "api-token")
 
-        expect(page.get_by_role("heading", name="Home", exact=True)).to_be_visible(timeout=30000)
 
-        setup_ssh(page, project_name, ssh_pubkey, email)
-        setup_token(page, project_name)
-        setup_2fa(page, project_name)
+def _setup_ssh(page, project_name):
+    setup_ssh(page, project_name, common.get_pass_creds(project_name, "id_rsa.pub"),
+              common.get_pass_creds(project_name, "email"))
 
-        # input('Press any key to continue\n')
-        common.signout(page)
 
-        page.close()
-        context.close()
-        browser.close()
+# in execution order, 2FA comes last since it changes the login
+STAGES = [
+    checkpoints.Stage("account", open_account,
+                      probe=lambda project_name: probes.github_account_exists(_username(project_name))),
+    checkpoints.Stage("ssh", _setup_ssh, requires=["account"],
+                      probe=lambda project_name: probes.github_ssh_key_added(
+                          _username(project_name), common.get_pass_creds(project_name, "id_rsa.pub"))),
+    checkpoints.Stage("token", setup_token, requires=["account"], artifacts=["api-token"],
+                      probe=lambda project_name: probes.github_token_valid(
+                          _api_token(project_name), _username(project_name))),
+    checkpoints.Stage("2fa", setup_2fa, requires=["account"], artifacts=["2FA-seed", "2FA-recovery-codes"],
+                      # the API shows the 2FA state only to a token with the user scope, the api-token has not:
+                      # the recovery codes are only shown once the OTP of the stored seed enabled 2FA
+                      probe=lambda project_name: probes.written_after(
+                          common.driver, project_name, "2FA-recovery-codes", "2FA-seed")),
+]
+
+
+@tracing.traced
+def run(browser, project_name, fast, stages=STAGES, flow_checkpoints=None):
+    flow_checkpoints = flow_checkpoints or checkpoints.Checkpoints(FLOW, project_name, common.driver)
+    context = common.driver.new_context(browser, fast)
+
+    page = context.new_page()
+    page.set_default_timeout(_DEFAULT_TIMEOUT)
+
+    # the remaining stages share one session, the earlier pages are not visited again
+    if STAGES[0] not in stages:
+        open_account(page, project_name)
+    flow_checkpoints.run(page, stages)
+
+    # input('Press any key to continue\n')
+    common.end_session(page, project_name)
+
+    page.close()
+    context.close()
+
+
+def main():
+    restart = cli.pop_flag("--restart")
+    project_name, fast = cli.parse_project_args()
+
+    if restart:
+        checkpoints.reset(project_name, FLOW)
+    flow_checkpoints = checkpoints.Checkpoints(FLOW, project_name, common.driver)
+    stages = flow_checkpoints.pending(STAGES)
+    if not stages:
+        print("GitHub account of " + project_name + " is set up already. Nothing to do.")
+        return
+
+    print("Stages to run: " + ", ".join(stage.name for stage in stages))
+    print("opening browser window")
+    with sync_playwright() as playwright:
+        launcher.run(playwright, lambda browser, fast: run(browser, project_name, fast, stages, flow_checkpoints), fast)
+    waits.report()
 
 
 if __name__ == "__main__":
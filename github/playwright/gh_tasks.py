@@ -0,0 +1,121 @@
+import argparse
+import sys
+import time
+
+import common
+import gh_create_otterdog_token
+import gh_create_renovate_token
+import gh_signup
+from ciadmin import launcher, passstore, tracing, waits
+from playwright.sync_api import sync_playwright, expect
+
+# Runs several GitHub bot tasks with one login: the tasks run in sequence in the same context, and the token
+# tasks reuse the token settings page that is already open. Each task writes its secrets to pass (one commit)
+# before the next one starts. A failing task does not stop the others, the exit code is 1 then.
+#
+# Usage:
+#   python gh_tasks.py <project_name> otterdog-token renovate-token jenkins-token ssh-key 2fa-check [--fast]
+#   python gh_tasks.py <project_name> otterdog-token renovate-token --keep-existing
+
+
+def _token_task(module, item):
+    def task(page, project_name, keep_existing):
+        token = module.create_token(page, regenerate=False if keep_existing else None)
+        if token is not None:
+            common.add_to_pass(project_name, token, item)
+    return task
+
+
+def _jenkins_token(page, project_name, keep_existing):
+    gh_signup.setup_token(page, project_name)
+
+
+def _ssh_key(page, project_name, keep_existing):
+    gh_signup.setup_ssh(page, project_name, common.get_pass_creds(project_name, "id_rsa.pub"),
+                        common.get_pass_creds(project_name, "email"))
+
+
+def _2fa_check(page, project_name, keep_existing):
+    gh_signup.setup_2fa(page, project_name)
+
+
+# in the order they run, whatever the order on the command line
+TASKS = {
+    "otterdog-token": _token_task(gh_create_otterdog_token, "otterdog-token"),
+    "renovate-token": _token_task(gh_create_renovate_token, "renovate-token"),
+    "jenkins-token": _jenkins_token,
+    "ssh-key": _ssh_key,
+    "2fa-check": _2fa_check,
+}
+
+_DEFAULT_TIMEOUT = 10000
+
+
+@tracing.traced
+def run(browser, project_name, fast, tasks, keep_existing=False):
+    # task -> result
+    results = {}
+    context = common.driver.new_context(browser, fast)
+    try:
+        page = context.new_page()
+        page.set_default_timeout(_DEFAULT_TIMEOUT)
+
+        username = common.get_pass_creds(project_name, "username")
+        password = common.get_pass_creds(project_name, "password")
+        common.login(page, project_name, username, password)
+        expect(page.get_by_role("heading", name="Home", exact=True)).to_be_visible(timeout=30000)
+
+        for name in tasks:
+            print(f"# Task '{name}'...")
+            start = time.monotonic()
+            try:
+                with tracing.span("task " + name), passstore.batch():
+                    TASKS[name](page, project_name, keep_existing)
+                results[name] = "ok"
+            except launcher.HumanInteractionRequired:
+                raise
+            except (Exception, SystemExit) as e:
+                print(f"ERROR: task '{name}' failed ({e})")
+                results[name] = "failed"
+            print(f"  {name}: {results[name]} ({time.monotonic() - start:.1f} s)")
+
+        common.end_session(page, project_name)
+        page.close()
+    finally:
+        context.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several GitHub bot tasks with one login.")
+    parser.add_argument("project_name", help="project name (e.g. technology.cbi)")
+    parser.add_argument("tasks", nargs="+", choices=list(TASKS), metavar="task",
+                        help=f"one or more of: {', '.join(TASKS)}")
+    parser.add_argument("--keep-existing", action="store_true",
+                        help="do not ask to regenerate otterdog/renovate tokens that exist already")
+    parser.add_argument("--fast", action="store_true", help="run headless and block resources that are not needed")
+    args = parser.parse_args()
+
+    tasks = [name for name in TASKS if name in args.tasks]
+    print("Project name: " + args.project_name)
+    print("Tasks: " + ", ".join(tasks))
+
+    results = {}
+
+    def flow(browser, fast):
+        results.update(run(browser, args.project_name, fast, tasks, args.keep_existing))
+
+    print("opening browser window")
+    with sync_playwright() as playwright:
+        launcher.run(playwright, flow, args.fast)
+    waits.report()
+
+    print("")
+    for name in tasks:
+        print(f"{name}: {results.get(name, 'not run')}")
+    if any(results.get(name) != "ok" for name in tasks):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
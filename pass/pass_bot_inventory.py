@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+import sys
+
+# make the shared ciadmin package and the projects API helpers importable when the script is run from this folder
+_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, _ROOT)
+sys.path.insert(0, os.path.join(_ROOT, "project"))
+
+from ciadmin import passstore
+
+# Inventory of the bot credentials in the password store, without decrypting anything.
+#
+# PASSWORD_STORE_DIR/bots is read in one os.scandir traversal into a project x site x item matrix (item names are the
+# pass entries, e.g. bots/technology.cbi/github.com/2FA-seed -> technology.cbi x github.com x 2FA-seed). The matrix
+# is checked against the items every site requires and, with --api, against the projects API cache to find
+# projects that use a forge without a bot (missing) and bots of unknown or archived projects (orphaned).
+#
+# Usage:
+#   python pass_bot_inventory.py [--store-dir DIR] [--site SITE ...] [--api [--cache-file FILE]] [--json]
+
+# required items per site, a site folder without one of them is incomplete
+SITES = {
+    "github.com": ["username", "password", "2FA-seed", "id_rsa"],
+    "gitlab.eclipse.org": ["username", "password"],
+    "central.sonatype.org": ["username", "password", "token-username", "token-password"],
+    "pypi.org": ["username", "password", "2FA-seed"],
+    "npmjs.com": ["username", "password"],
+    "gpg": ["key_id", "passphrase", "secret-subkeys.asc"],
+}
+
+# projects API fields that mean a project needs a bot on a site
+API_SITE_FIELDS = {
+    "github.com": ["github.org", "github_repos"],
+    "gitlab.eclipse.org": ["gitlab.project_group", "gitlab_repos"],
+}
+
+
+def scan(store_dir):
+    # project -> site -> set of items
+    matrix = {}
+    bots_dir = os.path.join(store_dir, "bots")
+    with os.scandir(bots_dir) as projects:
+        for project in projects:
+            if not project.is_dir() or project.name.startswith("."):
+                continue
+            sites = matrix.setdefault(project.name, {})
+            with os.scandir(project.path) as site_entries:
+                for site in site_entries:
+                    if not site.is_dir():
+                        continue
+                    with os.scandir(site.path) as items:
+                        sites[site.name] = {item.name[:-4] for item in items if item.name.endswith(".gpg") and item.is_file()}
+    return matrix
+
+
+def completeness(matrix, sites):
+    # site -> {"projects": [...], "missing": {item: [projects]}}
+    report = {}
+    for site in sites:
+        required = SITES.get(site, [])
+        projects = sorted(project for project, project_sites in matrix.items() if site in project_sites)
+        missing = {}
+        for item in required:
+            without = [project for project in projects if item not in matrix[project][site]]
+            if without:
+                missing[item] = without
+        report[site] = {"projects": projects, "missing": missing}
+    return report
+
+
+def cross_check(matrix, db):
+    bots = set(matrix)
+    active = db.active()
+    report = {
+        "unknown_projects": sorted(bots - db.all),
+        "archived_projects": sorted(bots & (db.all - active)),
+        "missing_bots": {},
+    }
+    for site, fields in API_SITE_FIELDS.items():
+        uses_site = set()
+        for field in fields:
+            uses_site |= db.with_field(field)
+        with_bot = {project for project, project_sites in matrix.items() if site in project_sites}
+        report["missing_bots"][site] = sorted((uses_site & active) - with_bot)
+    return report
+
+
+def print_report(matrix, report, api_report):
+    for site, site_report in report.items():
+        for item, projects in site_report["missing"].items():
+            for project in projects:
+                print(f"{site}: {item} is missing for project: {project}")
+
+    print()
+    print()
+    print(f"Number of projects {len(matrix)}")
+    for site, site_report in report.items():
+        print(f"Number of projects with {site} bot account {len(site_report['projects'])}")
+        for item, projects in site_report["missing"].items():
+            print(f"  Number of projects without {site} bot {item}: {len(projects)}")
+
+    if api_report is not None:
+        print()
+        print(f"Bots of projects unknown to the projects API ({len(api_report['unknown_projects'])}):")
+        for project in api_report["unknown_projects"]:
+            print(f"- {project}")
+        print(f"Bots of archived projects ({len(api_report['archived_projects'])}):")
+        for project in api_report["archived_projects"]:
+            print(f"- {project}")
+        for site, projects in api_report["missing_bots"].items():
+            print(f"Active projects that use {site} without a bot ({len(projects)}):")
+            for project in projects:
+                print(f"- {project}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventory of the bot credentials in the password store.")
+    parser.add_argument("--store-dir", help="password store (default: the CBI password store of the local config)")
+    parser.add_argument("--site", action="append", default=[],
+                        help=f"site to report on, can be given several times (default: {', '.join(SITES)})")
+    parser.add_argument("--api", action="store_true", help="cross-check the bots with the projects API cache")
+    parser.add_argument("--cache-file", help="projects API cache file (default: project/projects.eclipse.org-api-cache.json)")
+    parser.add_argument("--json", action="store_true", help="print the matrix and the reports as JSON")
+    args = parser.parse_args()
+
+    store_dir = args.store_dir or passstore.store_dir()
+    if not os.path.isdir(os.path.join(store_dir, "bots")):
+        print(f"ERROR: {store_dir}/bots does not exist.", file=sys.stderr)
+        sys.exit(1)
+
+    matrix = scan(store_dir)
+    report = completeness(matrix, args.site or list(SITES))
+    api_report = None
+    if args.api:
+        import fetch_projects_api
+        import projects_db
+        cache_file = args.cache_file or os.path.join(_ROOT, "project", fetch_projects_api.CACHE_FILE)
+        api_report = cross_check(matrix, projects_db.load(cache_file))
+
+    if args.json:
+        data = {"matrix": {project: {site: sorted(items) for site, items in sorted(sites.items())}
+                           for project, sites in sorted(matrix.items())},
+                "sites": report}
+        if api_report is not None:
+            data["api"] = api_report
+        print(json.dumps(data, indent=2))
+    else:
+        print_report(matrix, report, api_report)
+
+
+if __name__ == "__main__":
+    main()
@@ -29,21 +29,63 @@ if ! command -v readlink > /dev/null; then
   exit 1
 fi
 
+PASS_WRAPPER_FOLDER="$(dirname "$(readlink -f "${BASH_SOURCE[0]}")")"
+# store folders are resolved once per shell, not on every call
+declare -A _PASSW_STORE_DIRS=()
+
+_passw_broker_socket() {
+  echo "${CBI_BROKER_SOCKET:-${XDG_RUNTIME_DIR:-${HOME}/.cbi}/cbi-broker/broker.sock}"
+}
+
+# prints an entry from the credential broker (ciadmin/broker.py), fails if the broker is not running or does not have it
+_passw_from_broker() {
+  local store="${1:-}"
+  local entry="${2:-}"
+  local socket
+  socket="$(_passw_broker_socket)"
+  [[ -S "${socket}" ]] || return 1
+  if command -v socat > /dev/null; then
+    local status
+    {
+      IFS= read -r status || return 1
+      [[ "${status}" == "OK" ]] || return 1
+      cat
+    } < <(printf 'GET %s %s\n' "${store}" "${entry}" | socat -t 5 - "UNIX-CONNECT:${socket}" 2> /dev/null)
+  else
+    python3 "${PASS_WRAPPER_FOLDER}/../ciadmin/broker.py" get "${store}" "${entry}" 2> /dev/null
+  fi
+}
+
 passw() {
   local store="${1:-}"
   if [ "${store}" != "cbi" ] && [ "${store}" != "it" ]; then
     printf "ERROR: only 'cbi' and 'it' are valid values.\n"
     exit 1
   fi
+
+  # plain lookups ("passw cbi <entry>" or "passw cbi show <entry>") are answered by the broker when it runs
+  local entry=""
+  if [[ $# -eq 2 && "${2}" != -* ]]; then
+    entry="${2}"
+  elif [[ $# -eq 3 && "${2}" == "show" && "${3}" != -* ]]; then
+    entry="${3}"
+  fi
+  if [[ -n "${entry}" ]] && _passw_from_broker "${store}" "${entry}"; then
+    return 0
+  fi
+
   # backup env variable
   local backup_pw_store_dir
   if [[ ! -z "${PASSWORD_STORE_DIR:-}" ]]; then
     backup_pw_store_dir="${PASSWORD_STORE_DIR}"
   fi
 
-  local PASSWORD_STORE_DIR
-  PASSWORD_STORE_DIR="$("${SCRIPT_FOLDER}/../utils/local_config.sh" "get_var" "${store}-dir" "password-store")"
-  PASSWORD_STORE_DIR="$(readlink -f "${PASSWORD_STORE_DIR/#~\//${HOME}/}")"
+  if [[ -z "${_PASSW_STORE_DIRS[${store}]:-}" ]]; then
+    local store_dir
+    store_dir="$("${PASS_WRAPPER_FOLDER}/../utils/local_config.sh" "get_var" "${store}-dir" "password-store")"
+    _PASSW_STORE_DIRS[${store}]="$(readlink -f "${store_dir/#~\//${HOME}/}")"
+  fi
+  local PASSWORD_STORE_DIR="${_PASSW_STORE_DIRS[${store}]}"
   export PASSWORD_STORE_DIR
 
   local exitCode=0
@@ -51,6 +93,10 @@ passw() {
     >&2 echo "ERROR: pass entry not found - " "${@:2}" "in store $store"
     exitCode=1
   fi
+  # anything but a lookup may have changed the store, the broker must not serve stale entries
+  if [[ -z "${entry}" && -S "$(_passw_broker_socket)" ]]; then
+    python3 "${PASS_WRAPPER_FOLDER}/../ciadmin/broker.py" forget "${store}" 2> /dev/null || true
+  fi
 
   # reset env variable
   if [[ ! -z "${backup_pw_store_dir:-}" ]]; then
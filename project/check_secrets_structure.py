@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import fetch_projects_api
+import projects_db
+
+# Reconcile the secretsmanager (Vault) 'cbi' secrets engine with the projects.eclipse.org API.
+#
+# The KV tree is listed through the Vault HTTP API by a bounded pool of workers, down to --depth levels
+# (1: project folders, 2: per-site folders such as github.com or gpg, ...). Excluded prefixes are matched
+# with one compiled regex and are not walked. The results are set differences between the level 1 folders
+# and the API project ids, plus the per-site folders of every project when walking deeper.
+#
+# Works with any Vault compatible server, e.g. a local dev server:
+#   vault server -dev & VAULT_ADDR=http://127.0.0.1:8200 VAULT_TOKEN=... python check_secrets_structure.py
+#
+# Usage:
+#   python check_secrets_structure.py [--depth N] [--format text|json|markdown] [--refresh] [--exclude PREFIX ...]
+
+VAULT_SECRETS_ENGINE = "cbi"
+# projects that should not be validated against the API
+EXCLUDE_PATTERNS = [
+    "foundation-internal.",
+    "oss.",
+    "research.",
+]
+
+_DEFAULT_DEPTH = 1
+_DEFAULT_JOBS = 16
+_TIMEOUT = 30
+
+RED = '\033[0;31m'
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+NC = '\033[0m'
+
+
+def exclusion_regex(patterns):
+    if not patterns:
+        return None
+    return re.compile("|".join(re.escape(pattern) for pattern in patterns))
+
+
+def _vault_token():
+    token = os.environ.get("VAULT_TOKEN")
+    if token:
+        return token
+    try:
+        with open(os.path.expanduser("~/.vault-token"), 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+class Vault:
+    def __init__(self, addr, token, engine, jobs):
+        import requests
+        from requests.adapters import HTTPAdapter, Retry
+        self.addr = addr.rstrip("/")
+        self.engine = engine
+        self.session = requests.Session()
+        self.session.headers["X-Vault-Token"] = token
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=jobs, max_retries=retries)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def list(self, path):
+        # keys of a KV v2 folder, sub-folders end with "/"
+        with self.lock:
+            self.calls += 1
+        response = self.session.get(f"{self.addr}/v1/{self.engine}/metadata/{path}", params={"list": "true"},
+                                    timeout=_TIMEOUT)
+        if response.status_code == 404:
+            return []
+        if response.status_code == 403:
+            print("ERROR: your are not logged in to Vault or your token is invalid/expired.", file=sys.stderr)
+            sys.exit(2)
+        response.raise_for_status()
+        return response.json()["data"]["keys"]
+
+
+def walk(vault, depth, exclude, jobs):
+    # returns the folders (without trailing "/") of the first `depth` levels and the excluded level 1 folders
+    folders = []
+    excluded = []
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = {executor.submit(vault.list, ""): ("", 1)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                prefix, level = pending.pop(future)
+                for key in future.result():
+                    # level 1 secrets count as project entries, deeper only folders are walked
+                    if level > 1 and not key.endswith("/"):
+                        continue
+                    path = prefix + key.rstrip("/")
+                    if level == 1 and exclude is not None and exclude.match(path):
+                        excluded.append(path)
+                        continue
+                    folders.append(path)
+                    if level < depth and key.endswith("/"):
+                        pending[executor.submit(vault.list, path + "/")] = (path + "/", level + 1)
+    return sorted(folders), sorted(excluded)
+
+
+def reconcile(folders, excluded, db):
+    secrets = {folder for folder in folders if "/" not in folder}
+    api_projects = db.all
+    archived = api_projects - db.active()
+    sites = {}
+    for folder in folders:
+        parts = folder.split("/")
+        if len(parts) == 2:
+            sites.setdefault(parts[1], []).append(parts[0])
+    return {
+        "total": len(secrets) + len(excluded),
+        "found_in_api": sorted(secrets & api_projects),
+        "excluded": excluded,
+        "not_found_in_api": sorted(secrets - api_projects),
+        "archived_in_api": sorted(secrets & archived),
+        "active_without_secrets": sorted(db.active() - secrets),
+        "sites": {site: sorted(projects) for site, projects in sorted(sites.items())},
+        "deeper_paths": [folder for folder in folders if folder.count("/") >= 2],
+    }
+
+
+def _print_list(items, limit=None):
+    if not items:
+        print("  None")
+        return
+    for item in items[:limit]:
+        print("  - " + item)
+    if limit is not None and len(items) > limit:
+        print(f"  ... and {len(items) - limit} more")
+
+
+def print_text(result):
+    print(f"{GREEN}✓ Secretsmanager secrets found in API ({len(result['found_in_api'])}):{NC}")
+    _print_list(result["found_in_api"], 10)
+    print("")
+    print(f"{YELLOW}⊘ Secretsmanager secrets EXCLUDED from validation ({len(result['excluded'])}):{NC}")
+    _print_list(result["excluded"], 20)
+    print("")
+    print(f"{YELLOW}⊘ Secretsmanager secrets of ARCHIVED projects ({len(result['archived_in_api'])}):{NC}")
+    _print_list(result["archived_in_api"])
+    print("")
+    print(f"{RED}✗ Secretsmanager secrets NOT found in API ({len(result['not_found_in_api'])}):{NC}")
+    _print_list(result["not_found_in_api"])
+    print("")
+    if result["sites"]:
+        print("Sites (level 2):")
+        for site, projects in result["sites"].items():
+            print(f"  - {site}: {len(projects)} project(s)")
+        print("")
+
+    print("===================================")
+    print("Summary:")
+    print(f"  Total Secretsmanager secrets: {result['total']}")
+    print(f"  Found in API: {len(result['found_in_api'])}")
+    print(f"  Excluded: {len(result['excluded'])}")
+    print(f"  NOT found in API: {len(result['not_found_in_api'])}")
+    print(f"  Archived in API: {len(result['archived_in_api'])}")
+    print(f"  Active API projects without secrets: {len(result['active_without_secrets'])}")
+    print(f"  Vault list calls: {result['vault_calls']}")
+    print("===================================")
+
+
+def print_markdown(result):
+    print(f"# Secretsmanager '{result['engine']}' vs projects API")
+    print("")
+    print("| | Count |")
+    print("|---|---|")
+    print(f"| Secretsmanager secrets | {result['total']} |")
+    for key, title in [("found_in_api", "Found in API"), ("excluded", "Excluded"), ("not_found_in_api", "NOT found in API"),
+                       ("archived_in_api", "Archived in API"), ("active_without_secrets", "Active API projects without secrets")]:
+        print(f"| {title} | {len(result[key])} |")
+    for key, title in [("not_found_in_api", "Secrets NOT found in API"), ("archived_in_api", "Secrets of archived projects"),
+                       ("excluded", "Excluded secrets")]:
+        print("")
+        print(f"## {title}")
+        print("")
+        if not result[key]:
+            print("- None")
+        for item in result[key]:
+            print(f"- `{item}`")
+    if result["sites"]:
+        print("")
+        print("## Sites")
+        print("")
+        print("| Site | Projects |")
+        print("|---|---|")
+        for site, projects in result["sites"].items():
+            print(f"| {site} | {len(projects)} |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the secretsmanager structure of the 'cbi' secrets engine against the projects API.")
+    parser.add_argument("--vault-addr", default=os.environ.get("VAULT_ADDR"), help="Vault address (default: VAULT_ADDR)")
+    parser.add_argument("--engine", default=VAULT_SECRETS_ENGINE, help=f"KV v2 secrets engine (default: {VAULT_SECRETS_ENGINE})")
+    parser.add_argument("--depth", type=int, default=_DEFAULT_DEPTH,
+                        help=f"number of levels to list, 2 includes the per-site folders (default: {_DEFAULT_DEPTH})")
+    parser.add_argument("--exclude", action="append", default=[], help="additional excluded prefix, can be given several times")
+    parser.add_argument("--format", choices=["text", "json", "markdown"], default="text", help="output format (default: text)")
+    parser.add_argument("-j", "--jobs", type=int, default=_DEFAULT_JOBS,
+                        help=f"number of concurrent Vault list calls (default: {_DEFAULT_JOBS})")
+    parser.add_argument("--cache-file", default=fetch_projects_api.CACHE_FILE,
+                        help=f"projects API cache file (default: {fetch_projects_api.CACHE_FILE})")
+    parser.add_argument("-r", "--refresh", action="store_true", help="force refresh of API cache")
+    args = parser.parse_args()
+
+    token = _vault_token()
+    if not args.vault_addr or not token:
+        print("ERROR: VAULT_ADDR and VAULT_TOKEN (or ~/.vault-token) are required.", file=sys.stderr)
+        sys.exit(2)
+
+    log = sys.stderr if args.format != "text" else sys.stdout
+    print(f"========= Fetching secretsmanager secrets from '{args.engine}' engine (depth {args.depth})...", file=log)
+    vault = Vault(args.vault_addr, token, args.engine, max(1, args.jobs))
+    folders, excluded = walk(vault, max(1, args.depth), exclusion_regex(EXCLUDE_PATTERNS + args.exclude), max(1, args.jobs))
+
+    print("========= Fetching Eclipse projects from API...", file=log)
+    db = projects_db.load(args.cache_file, 0 if args.refresh else fetch_projects_api.DEFAULT_TTL)
+    print(f"API Projects found: {len(db.all)}", file=log)
+    print("", file=log)
+
+    result = dict(reconcile(folders, excluded, db), engine=args.engine, depth=args.depth, vault_calls=vault.calls)
+    if args.format == "json":
+        print(json.dumps(result, indent=2))
+    elif args.format == "markdown":
+        print_markdown(result)
+    else:
+        print_text(result)
+
+    if result["not_found_in_api"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+
+# Fetch and cache the projects.eclipse.org API as a single JSON array.
+#
+# Pages are fetched concurrently over one pooled HTTP session. Every page is revalidated with the ETag/Last-Modified
+# it had the last time (stored next to the cache in <cache file>.meta.json), so unchanged pages are not downloaded again.
+#
+# Usage:
+#   python fetch_projects_api.py [--cache-file FILE] [--ttl SECONDS] [--force] [-j JOBS]
+
+API_URL = "https://projects.eclipse.org/api/projects"
+CACHE_FILE = "projects.eclipse.org-api-cache.json"
+PAGE_SIZE = 100
+
+DEFAULT_TTL = 14400  # 4 hours
+_DEFAULT_JOBS = 8
+_TIMEOUT = 30
+
+
+def _meta_file(cache_file):
+    return cache_file + ".meta.json"
+
+
+def _read_json(path, default):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path, data):
+    # write to a temporary file in the same folder and rename it, readers never see a partial file
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def is_fresh(cache_file, ttl):
+    return os.path.isfile(cache_file) and os.path.getmtime(cache_file) > time.time() - ttl
+
+
+def _session(jobs):
+    import requests
+    from requests.adapters import HTTPAdapter, Retry
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=jobs, max_retries=retries)
+    session.mount("https://", adapter)
+    return session
+
+
+def _last_page(response, default):
+    last = response.links.get("last")
+    if last is None:
+        return default
+    return int(parse_qs(urlparse(last["url"]).query).get("page", ["1"])[0])
+
+
+def _fetch_page(session, page, cached):
+    headers = {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    response = session.get(API_URL, params={"pagesize": PAGE_SIZE, "page": page}, headers=headers, timeout=_TIMEOUT)
+    if response.status_code == 304:
+        return response, None
+    response.raise_for_status()
+    return response, response.json()
+
+
+def fetch(cache_file=CACHE_FILE, jobs=_DEFAULT_JOBS):
+    meta = _read_json(_meta_file(cache_file), {"pages": {}})
+    cached_projects = _read_json(cache_file, None)
+    if not isinstance(cached_projects, list):
+        # the old cache format (concatenated pages) cannot be reused
+        cached_projects = None
+        meta = {"pages": {}}
+
+    # slice the cached projects back into the pages they came from
+    cached_pages = {}
+    offset = 0
+    for page in sorted(meta["pages"], key=int):
+        count = meta["pages"][page]["count"]
+        cached_pages[int(page)] = cached_projects[offset:offset + count] if cached_projects is not None else None
+        offset += count
+
+    def page_meta(page):
+        # conditional requests only make sense if the page content is still available
+        if cached_pages.get(page) is None:
+            return {}
+        return meta["pages"][str(page)]
+
+    session = _session(jobs)
+    first_response, first_projects = _fetch_page(session, 1, page_meta(1))
+    # a 304 does not necessarily carry the Link header, fall back to the last page seen before
+    last_page = _last_page(first_response, meta.get("last_page", 1))
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {page: executor.submit(_fetch_page, session, page, page_meta(page)) for page in range(2, last_page + 1)}
+        results = [(1, first_response, first_projects)]
+        results += [(page, *future.result()) for page, future in futures.items()]
+
+    pages = {}
+    page_contents = []
+    revalidated = 0
+    for page, response, page_projects in results:
+        if page_projects is None:
+            page_projects = cached_pages[page]
+            page_info = dict(meta["pages"][str(page)])
+            revalidated += 1
+        else:
+            page_info = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        page_info["count"] = len(page_projects)
+        pages[str(page)] = page_info
+        page_contents.append(page_projects)
+
+    # without a Link header, new pages only show up as a full last page
+    while len(page_contents[-1]) == PAGE_SIZE:
+        response, page_projects = _fetch_page(session, last_page + 1, {})
+        if not page_projects:
+            break
+        last_page += 1
+        pages[str(last_page)] = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified"),
+                                 "count": len(page_projects)}
+        page_contents.append(page_projects)
+
+    projects = [project for page_projects in page_contents for project in page_projects]
+    _write_json(cache_file, projects)
+    _write_json(_meta_file(cache_file), {"fetched_at": int(time.time()), "last_page": last_page, "pages": pages})
+    print(f"Fetched {len(projects)} projects ({last_page} page(s), {revalidated} unchanged).", file=sys.stderr)
+    return projects
+
+
+def load(cache_file=CACHE_FILE, ttl=DEFAULT_TTL, jobs=_DEFAULT_JOBS):
+    # projects from the cache, refreshed first if it is older than the TTL
+    if not is_fresh(cache_file, ttl):
+        print(f"Cache expired ({ttl} seconds). Fetching data from projects.eclipse.org API...", file=sys.stderr)
+        return fetch(cache_file, jobs)
+    with open(cache_file, 'r') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch and cache the projects.eclipse.org API.")
+    parser.add_argument("--cache-file", default=CACHE_FILE, help=f"cache file (default: {CACHE_FILE})")
+    parser.add_argument("--ttl", type=int, default=DEFAULT_TTL,
+                        help=f"refresh the cache if it is older than this many seconds (default: {DEFAULT_TTL})")
+    parser.add_argument("--force", action="store_true", help="refresh the cache regardless of its age")
+    parser.add_argument("-j", "--jobs", type=int, default=_DEFAULT_JOBS,
+                        help=f"number of pages fetched concurrently (default: {_DEFAULT_JOBS})")
+    args = parser.parse_args()
+
+    if args.force or not is_fresh(args.cache_file, args.ttl):
+        print("Fetching data from projects.eclipse.org API...", file=sys.stderr)
+        fetch(args.cache_file, max(1, args.jobs))
+
+
+if __name__ == "__main__":
+    main()
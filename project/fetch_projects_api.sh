@@ -9,27 +9,13 @@
 #*******************************************************************************
 
 # Fetch and cache projects.eclipse.org API
-# TODO: make cache timeout configurable
+# Usage: fetch_projects_api.sh [--cache-file FILE] [--ttl SECONDS] [--force] [-j JOBS]
 
 # Bash strict-mode
 set -o errexit
 set -o nounset
 set -o pipefail
 
-CACHE_FILE="projects.eclipse.org-api-cache.json"
-PAGE_SIZE=100
-CACHE_TIMEOUT=14400 # 4 hours
-LAST_PAGE="$(curl -sSI "https://projects.eclipse.org/api/projects?pagesize=${PAGE_SIZE}" | grep "link:" | cut -d',' -f4 | sed 's/.*page=//' | sed 's/&.*//')"
+SCRIPT_FOLDER="$(dirname "$(readlink -f "${BASH_SOURCE[0]}")")"
 
-# only query API if cache file is older than 1 hour
-if [[ ! -f ${CACHE_FILE} ]] || [ "$(stat --format=%Y ${CACHE_FILE})" -le $(( $(date +%s) - CACHE_TIMEOUT )) ]; then
-  echo "Cache expired (4 hours). Fetching data from projecst.eclipse.org API..."
-  for page in $(seq 1 1 "${LAST_PAGE}"); do
-    response="$(curl -sSL "https://projects.eclipse.org/api/projects?pagesize=${PAGE_SIZE}&page=${page}")"
-    full_response+="${response}"
-  done
-  echo "${full_response}" > "${CACHE_FILE}"
-fi
-
-#no_of_projects="$(jq .[].short_project_id < ${CACHE_FILE}| wc -l)"
-#echo "Found ${no_of_projects} projects."
\ No newline at end of file
+python3 "${SCRIPT_FOLDER}/fetch_projects_api.py" "$@"
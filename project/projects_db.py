@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+
+import fetch_projects_api
+
+# In-memory projects database built from the projects.eclipse.org API cache. The cache is parsed once, the fields
+# used by the reports are indexed, so that queries are set operations instead of passes over the whole file.
+#
+# Usage:
+#   python projects_db.py stats [--jiro-instances-dir DIR]
+#   python projects_db.py list [--all] [--where FILTER ...] [--field FIELD] [--edit-urls]
+#
+# Filters: "field" (not empty), "!field" (empty), "field=value", "field!=value", e.g. --where gerrit_repos --where github.org
+
+INDEXED_FIELDS = ["state", "github.org", "github_repos", "gitlab.project_group", "gitlab_repos", "gerrit_repos"]
+ARCHIVED = "Archived"
+EDIT_URL = "https://projects.eclipse.org/projects/{}/edit"
+
+_DEFAULT_JIRO_INSTANCES_DIR = os.path.expanduser("~/git/jiro/instances")
+
+
+def get_field(project, field):
+    value = project
+    for key in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _is_empty(value):
+    return value is None or value == "" or value == [] or value == {}
+
+
+class ProjectsDb:
+    def __init__(self, projects):
+        self.projects = {project["project_id"]: project for project in projects}
+        self.all = set(self.projects)
+        # field -> ids of the projects where the field is not empty
+        self.non_empty = {}
+        # field -> value -> ids, for scalar fields
+        self.by_value = {}
+        for field in INDEXED_FIELDS:
+            self._index(field)
+
+    def _index(self, field):
+        non_empty = set()
+        by_value = {}
+        for project_id, project in self.projects.items():
+            value = get_field(project, field)
+            if not _is_empty(value):
+                non_empty.add(project_id)
+            if isinstance(value, str):
+                by_value.setdefault(value, set()).add(project_id)
+        self.non_empty[field] = non_empty
+        self.by_value[field] = by_value
+
+    def active(self):
+        return self.all - self.by_value["state"].get(ARCHIVED, set())
+
+    def with_field(self, field):
+        if field not in self.non_empty:
+            self._index(field)
+        return self.non_empty[field]
+
+    def without_field(self, field):
+        return self.all - self.with_field(field)
+
+    def with_value(self, field, value):
+        if field not in self.by_value:
+            self._index(field)
+        return self.by_value[field].get(value, set())
+
+    def where(self, condition, ids=None):
+        # condition: "field", "!field", "field=value" or "field!=value"
+        ids = self.all if ids is None else ids
+        if "!=" in condition:
+            field, value = condition.split("!=", 1)
+            return ids - self.with_value(field, value)
+        if "=" in condition:
+            field, value = condition.split("=", 1)
+            return ids & self.with_value(field, value)
+        if condition.startswith("!"):
+            return ids & self.without_field(condition[1:])
+        return ids & self.with_field(condition)
+
+    def select(self, conditions, include_archived=False):
+        ids = self.all if include_archived else self.active()
+        for condition in conditions:
+            ids = self.where(condition, ids)
+        return sorted(ids)
+
+    def stats(self):
+        active = self.active()
+        github_org = self.with_field("github.org")
+        github_repos = self.with_field("github_repos")
+        gitlab_group = self.with_field("gitlab.project_group")
+        gitlab_repos = self.with_field("gitlab_repos")
+        gerrit_repos = self.with_field("gerrit_repos")
+        return {
+            "projects": len(self.all),
+            "active": len(active),
+            "github": len(active & (github_org | github_repos)),
+            "github_org": len(active & github_org),
+            "github_org_and_repos": len(active & github_org & github_repos),
+            "gitlab": len(active & (gitlab_group | gitlab_repos)),
+            "gitlab_group": len(active & gitlab_group),
+            "gitlab_group_and_repos": len(active & gitlab_group & gitlab_repos),
+            "gitlab_repos_only": len(active & (gitlab_repos - gitlab_group)),
+            "gerrit": len(active & gerrit_repos),
+            "gerrit_and_github": len(active & gerrit_repos & github_repos),
+            "gerrit_and_gitlab": len(active & gerrit_repos & gitlab_repos),
+        }
+
+
+def load(cache_file=fetch_projects_api.CACHE_FILE, ttl=fetch_projects_api.DEFAULT_TTL):
+    return ProjectsDb(fetch_projects_api.load(cache_file, ttl))
+
+
+def print_stats(db, jiro_instances_dir):
+    stats = db.stats()
+    print(f"Number of projects: {stats['projects']}")
+    print(f"Number of active projects: {stats['active']}")
+    print("")
+    print(f"Number of projects that use GitHub: {stats['github']}")
+    print(f"  Number of projects that use the GitHub org field: {stats['github_org']}")
+    print(f"  Number of projects that use the GitHub org AND github_repos fields: {stats['github_org_and_repos']}")
+    print(f"Number of projects that use GitLab: {stats['gitlab']}")
+    print(f"  Number of projects that use the GitLab project group field: {stats['gitlab_group']}")
+    print(f"  Number of projects that use the GitLab project group AND gitlab_repos fields: {stats['gitlab_group_and_repos']}")
+    print(f"  Number of projects that use ONLY the gitlab_repos fields: {stats['gitlab_repos_only']}")
+    print(f"Number of projects that use Gerrit: {stats['gerrit']}")
+    print(f"  Number of projects that use Gerrit and GitHub: {stats['gerrit_and_github']}")
+    print(f"  Number of projects that use Gerrit and GitLab: {stats['gerrit_and_gitlab']}")
+    print("")
+    print("")
+
+    print("Projects that use Gerrit and have a Jenkins instance:")
+    counter = 0
+    for project_id in db.select(["gerrit_repos"]):
+        if os.path.isdir(os.path.join(jiro_instances_dir, project_id)):
+            print(f"- {project_id}")
+            counter += 1
+    print(f"Found {counter} projects.")
+
+    for title, conditions in [("Projects that use Gerrit and GitHub:", ["gerrit_repos", "github.org"]),
+                              ("Projects that use Gerrit and GitLab:", ["gerrit_repos", "gitlab_repos"]),
+                              ("Projects that only use GitLab repo fields:", ["!gitlab.project_group", "gitlab_repos"])]:
+        print("")
+        print(title)
+        for project_id in db.select(conditions):
+            print("- " + EDIT_URL.format(project_id))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the projects.eclipse.org API cache.")
+    parser.add_argument("--cache-file", default=fetch_projects_api.CACHE_FILE,
+                        help=f"cache file (default: {fetch_projects_api.CACHE_FILE})")
+    parser.add_argument("--ttl", type=int, default=fetch_projects_api.DEFAULT_TTL,
+                        help=f"refresh the cache if it is older than this many seconds (default: {fetch_projects_api.DEFAULT_TTL})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    stats_parser = subparsers.add_parser("stats", help="print the projects statistics")
+    stats_parser.add_argument("--jiro-instances-dir", default=_DEFAULT_JIRO_INSTANCES_DIR,
+                              help=f"JIRO instances folder (default: {_DEFAULT_JIRO_INSTANCES_DIR})")
+
+    list_parser = subparsers.add_parser("list", help="list the projects that match all filters")
+    list_parser.add_argument("--where", action="append", default=[], help="filter, can be given several times")
+    list_parser.add_argument("--all", action="store_true", help="include archived projects")
+    list_parser.add_argument("--field", default="project_id", help="field to print (default: project_id)")
+    list_parser.add_argument("--edit-urls", action="store_true", help="print the edit URLs of the projects")
+    args = parser.parse_args()
+
+    db = load(args.cache_file, args.ttl)
+
+    if args.command == "stats":
+        print_stats(db, args.jiro_instances_dir)
+    elif args.command == "list":
+        for project_id in db.select(args.where, include_archived=args.all):
+            if args.edit_urls:
+                print(EDIT_URL.format(project_id))
+            else:
+                value = get_field(db.projects[project_id], args.field)
+                print(value if isinstance(value, str) else json.dumps(value))
+
+
+if __name__ == "__main__":
+    main()
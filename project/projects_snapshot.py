@@ -0,0 +1,197 @@
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+import fetch_projects_api
+from projects_db import ARCHIVED, get_field
+
+# Versioned snapshots of the projects.eclipse.org API and a streaming differ, so that regular audits only need to
+# look at what changed since the last run.
+#
+# Snapshots are gzipped JSONL files sorted by project_id (<snapshot dir>/<UTC timestamp>.jsonl.gz). The differ
+# merges two snapshots line by line and writes one JSON event per line:
+#   {"event": "added" | "removed", "project_id": ...}
+#   {"event": "renamed", "project_id": <new>, "old_project_id": <old>}
+#   {"event": "archived" | "unarchived", "project_id": ..., "old": <state>, "new": <state>}
+#   {"event": "changed", "project_id": ..., "field": ..., "old": ..., "new": ...[, "added": [...], "removed": [...]]}
+#
+# Usage:
+#   python projects_snapshot.py save [--keep N]
+#   python projects_snapshot.py diff [OLD_SNAPSHOT [NEW_SNAPSHOT]]
+#   python projects_snapshot.py update      # save a new snapshot and print the changes since the previous one
+#   python projects_snapshot.py list
+
+SNAPSHOT_DIR = os.path.expanduser('~/.cbi/projects-snapshots')
+SNAPSHOT_SUFFIX = ".jsonl.gz"
+DIFF_FIELDS = ["github.org", "gitlab.project_group", "github_repos", "gitlab_repos", "gerrit_repos"]
+REPO_FIELDS = ["github_repos", "gitlab_repos", "gerrit_repos"]
+
+_DEFAULT_KEEP = 30
+
+
+def list_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    if not os.path.isdir(snapshot_dir):
+        return []
+    names = sorted(name for name in os.listdir(snapshot_dir) if name.endswith(SNAPSHOT_SUFFIX))
+    return [os.path.join(snapshot_dir, name) for name in names]
+
+
+def save(projects, snapshot_dir=SNAPSHOT_DIR, keep=_DEFAULT_KEEP):
+    os.makedirs(snapshot_dir, exist_ok=True)
+    path = os.path.join(snapshot_dir, time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()) + SNAPSHOT_SUFFIX)
+    with gzip.open(path + ".tmp", 'wt') as f:
+        for project in sorted(projects, key=lambda project: project["project_id"]):
+            f.write(json.dumps(project, sort_keys=True) + "\n")
+    os.replace(path + ".tmp", path)
+
+    # only keep the latest snapshots
+    for old_snapshot in list_snapshots(snapshot_dir)[:-keep] if keep > 0 else []:
+        os.remove(old_snapshot)
+    return path
+
+
+def read_snapshot(path):
+    with gzip.open(path, 'rt') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def _repo_urls(value):
+    urls = set()
+    for repo in value or []:
+        urls.add(repo.get("url", "") if isinstance(repo, dict) else str(repo))
+    return urls
+
+
+def _project_changes(old, new):
+    project_id = new["project_id"]
+    old_state, new_state = old.get("state"), new.get("state")
+    if old_state != new_state and ARCHIVED in (old_state, new_state):
+        yield {"event": "archived" if new_state == ARCHIVED else "unarchived", "project_id": project_id,
+               "old": old_state, "new": new_state}
+
+    for field in DIFF_FIELDS:
+        old_value, new_value = get_field(old, field), get_field(new, field)
+        if field in REPO_FIELDS:
+            old_urls, new_urls = _repo_urls(old_value), _repo_urls(new_value)
+            if old_urls != new_urls:
+                yield {"event": "changed", "project_id": project_id, "field": field, "old": sorted(old_urls),
+                       "new": sorted(new_urls), "added": sorted(new_urls - old_urls),
+                       "removed": sorted(old_urls - new_urls)}
+        elif (old_value or "") != (new_value or ""):
+            yield {"event": "changed", "project_id": project_id, "field": field, "old": old_value, "new": new_value}
+
+
+def _rename_key(project):
+    repos = set()
+    for field in REPO_FIELDS:
+        repos |= _repo_urls(project.get(field))
+    return project.get("short_project_id"), project.get("name"), frozenset(repos)
+
+
+def _match_renames(removed, added):
+    # a project that disappears and one that appears with the same short id, name or repositories is a rename
+    renames = []
+    for key_index in range(3):
+        by_key = {}
+        for project in added.values():
+            key = _rename_key(project)[key_index]
+            if key:
+                by_key.setdefault(key, []).append(project)
+        for old_id, old_project in list(removed.items()):
+            candidates = by_key.get(_rename_key(old_project)[key_index], [])
+            if len(candidates) == 1 and candidates[0]["project_id"] in added:
+                new_project = candidates[0]
+                renames.append((old_project, new_project))
+                del removed[old_id]
+                del added[new_project["project_id"]]
+    return renames
+
+
+def diff(old_projects, new_projects):
+    # old_projects and new_projects are iterables sorted by project_id (like snapshots), they are merged in one pass
+    removed = {}
+    added = {}
+    old_iter, new_iter = iter(old_projects), iter(new_projects)
+    old, new = next(old_iter, None), next(new_iter, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old["project_id"] < new["project_id"]):
+            removed[old["project_id"]] = old
+            old = next(old_iter, None)
+        elif old is None or new["project_id"] < old["project_id"]:
+            added[new["project_id"]] = new
+            new = next(new_iter, None)
+        else:
+            yield from _project_changes(old, new)
+            old, new = next(old_iter, None), next(new_iter, None)
+
+    for old_project, new_project in _match_renames(removed, added):
+        yield {"event": "renamed", "project_id": new_project["project_id"], "old_project_id": old_project["project_id"]}
+        yield from _project_changes(old_project, new_project)
+    for project_id in sorted(added):
+        yield {"event": "added", "project_id": project_id}
+    for project_id in sorted(removed):
+        yield {"event": "removed", "project_id": project_id}
+
+
+def _print_events(events):
+    count = 0
+    for event in events:
+        print(json.dumps(event))
+        count += 1
+    print(f"{count} change(s).", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Save and diff snapshots of the projects.eclipse.org API.")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR, help=f"snapshot folder (default: {SNAPSHOT_DIR})")
+    parser.add_argument("--cache-file", default=fetch_projects_api.CACHE_FILE,
+                        help=f"API cache file (default: {fetch_projects_api.CACHE_FILE})")
+    parser.add_argument("--ttl", type=int, default=fetch_projects_api.DEFAULT_TTL,
+                        help=f"refresh the API cache if it is older than this many seconds (default: {fetch_projects_api.DEFAULT_TTL})")
+    parser.add_argument("--keep", type=int, default=_DEFAULT_KEEP,
+                        help=f"number of snapshots to keep, 0 keeps all (default: {_DEFAULT_KEEP})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("save", help="save a snapshot of the current API cache")
+    subparsers.add_parser("update", help="save a snapshot and print the changes since the previous one")
+    subparsers.add_parser("list", help="list the snapshots")
+    diff_parser = subparsers.add_parser("diff", help="print the changes between two snapshots (default: the latest two)")
+    diff_parser.add_argument("old", nargs="?", help="old snapshot")
+    diff_parser.add_argument("new", nargs="?", help="new snapshot")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for snapshot in list_snapshots(args.snapshot_dir):
+            print(snapshot)
+
+    elif args.command in ("save", "update"):
+        previous = list_snapshots(args.snapshot_dir)
+        path = save(fetch_projects_api.load(args.cache_file, args.ttl), args.snapshot_dir, args.keep)
+        print("Saved snapshot " + path, file=sys.stderr)
+        if args.command == "update":
+            if not previous:
+                print("No previous snapshot, nothing to compare.", file=sys.stderr)
+            else:
+                _print_events(diff(read_snapshot(previous[-1]), read_snapshot(path)))
+
+    elif args.command == "diff":
+        snapshots = list_snapshots(args.snapshot_dir)
+        old, new = args.old, args.new
+        if old is None:
+            if len(snapshots) < 2:
+                print("ERROR: at least two snapshots are needed")
+                sys.exit(1)
+            old, new = snapshots[-2], snapshots[-1]
+        elif new is None:
+            if not snapshots:
+                print("ERROR: no snapshot found in " + args.snapshot_dir)
+                sys.exit(1)
+            new = snapshots[-1]
+        _print_events(diff(read_snapshot(old), read_snapshot(new)))
+
+
+if __name__ == "__main__":
+    main()
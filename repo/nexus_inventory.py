@@ -0,0 +1,278 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from repo_size import DEFAULT_NEXUS_HOST, Aggregate, Nexus, bytes_to_human, print_report
+
+# Persisted inventory of the assets of the Nexus repositories of a host, with the size history of every repository.
+#
+# The assets API cannot filter on modification dates, so a refresh still lists the repositories, but it only
+# writes the assets that were added, changed (checksum or lastModified) or removed since the last refresh. Every
+# refresh records the size of each repository, which gives the growth over time without rescanning anything.
+#
+# Usage:
+#   python nexus_inventory.py refresh [--all [--include-proxy]] [-j JOBS] [REPO ...]
+#   python nexus_inventory.py report [--days DAYS]
+#   python nexus_inventory.py history <REPO>
+#   python nexus_inventory.py size [--json] <REPO>      # repo_size report from the inventory, without API calls
+# Options --host (default: NEXUS_HOST or repo.eclipse.org) and --db (default: ~/.cbi/nexus-inventory-<host>.sqlite)
+# go before the command. Credentials: NEXUS_TOKEN_USERNAME and NEXUS_TOKEN_PASSWORD
+
+_DEFAULT_JOBS = 4
+_DEFAULT_DAYS = 7
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    repository TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    sha1 TEXT,
+    last_modified TEXT,
+    seen_run INTEGER NOT NULL,
+    PRIMARY KEY (repository, path)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS repo_history (
+    run_id INTEGER NOT NULL,
+    repository TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    files INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    added INTEGER NOT NULL,
+    changed INTEGER NOT NULL,
+    removed INTEGER NOT NULL,
+    PRIMARY KEY (run_id, repository)
+);
+"""
+
+
+def default_db(host):
+    return os.path.expanduser(f"~/.cbi/nexus-inventory-{host}.sqlite")
+
+
+def connect(db_file):
+    os.makedirs(os.path.dirname(os.path.abspath(db_file)), exist_ok=True)
+    db = sqlite3.connect(db_file, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(_SCHEMA)
+    return db
+
+
+class Reconciler:
+    # receives the asset pages of one repository (same interface as repo_size.Aggregate) and only writes the deltas
+    def __init__(self, db, lock, run_id, repository):
+        self.db = db
+        self.lock = lock
+        self.run_id = run_id
+        self.repository = repository
+        self.added = 0
+        self.changed = 0
+
+    def add_items(self, items):
+        assets = {}
+        for item in items:
+            if item.get("path") is None or item.get("fileSize") is None:
+                continue
+            sha1 = (item.get("checksum") or {}).get("sha1")
+            assets[item["path"].lstrip("/")] = (int(item["fileSize"]), sha1, item.get("lastModified"))
+        if not assets:
+            return
+
+        with self.lock:
+            known = {}
+            paths = list(assets)
+            for i in range(0, len(paths), 500):
+                chunk = paths[i:i + 500]
+                rows = self.db.execute(
+                    f"SELECT path, size, sha1, last_modified FROM assets WHERE repository = ? AND path IN ({','.join('?' * len(chunk))})",
+                    [self.repository] + chunk)
+                known.update((row[0], row[1:]) for row in rows)
+
+            upserts = []
+            seen = []
+            for path, asset in assets.items():
+                if path not in known:
+                    self.added += 1
+                    upserts.append((self.repository, path, *asset, self.run_id))
+                elif known[path] != asset:
+                    self.changed += 1
+                    upserts.append((self.repository, path, *asset, self.run_id))
+                else:
+                    seen.append((self.run_id, self.repository, path))
+            self.db.executemany("INSERT OR REPLACE INTO assets (repository, path, size, sha1, last_modified, seen_run) "
+                                "VALUES (?, ?, ?, ?, ?, ?)", upserts)
+            self.db.executemany("UPDATE assets SET seen_run = ? WHERE repository = ? AND path = ?", seen)
+            self.db.commit()
+
+    def finish(self):
+        with self.lock:
+            removed = self.db.execute("DELETE FROM assets WHERE repository = ? AND seen_run < ?",
+                                      (self.repository, self.run_id)).rowcount
+            files, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM assets WHERE repository = ?",
+                                          (self.repository,)).fetchone()
+            self.db.execute("INSERT OR REPLACE INTO repo_history VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            (self.run_id, self.repository, time.time(), files, size, self.added, self.changed, removed))
+            self.db.commit()
+        return files, size, removed
+
+
+def refresh(db, nexus, repositories, jobs):
+    lock = threading.Lock()
+    run_id = db.execute("INSERT INTO runs (started) VALUES (?)", (time.time(),)).lastrowid
+    db.commit()
+
+    def refresh_repository(repository):
+        reconciler = Reconciler(db, lock, run_id, repository)
+        try:
+            nexus.walk("/service/rest/v1/assets", {"repository": repository}, reconciler, label=repository)
+        except Exception as e:
+            # the assets that were not listed must not be considered removed
+            print(f"[ERROR] {repository}: {e}", file=sys.stderr)
+            return False
+        files, size, removed = reconciler.finish()
+        print(f"[INFO] {repository}: {files} files, {bytes_to_human(size)} "
+              f"(+{reconciler.added} added, {reconciler.changed} changed, -{removed} removed)", file=sys.stderr)
+        return True
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        results = list(executor.map(refresh_repository, repositories))
+
+    db.execute("UPDATE runs SET finished = ? WHERE id = ?", (time.time(), run_id))
+    db.commit()
+    print(f"[INFO] Refreshed {sum(results)}/{len(repositories)} repositories ({nexus.api_calls} API calls).", file=sys.stderr)
+    return all(results)
+
+
+def growth(db, days):
+    # latest size of every repository compared to the latest refresh that is at least DAYS old
+    since = time.time() - days * 86400
+    rows = db.execute("""
+        SELECT latest.repository, latest.timestamp, latest.files, latest.bytes, previous.files, previous.bytes
+        FROM repo_history latest
+        LEFT JOIN repo_history previous ON previous.repository = latest.repository AND previous.timestamp = (
+            SELECT MAX(timestamp) FROM repo_history WHERE repository = latest.repository AND timestamp <= ?)
+        WHERE latest.timestamp = (SELECT MAX(timestamp) FROM repo_history WHERE repository = latest.repository)
+    """, (since,))
+    report = []
+    for repository, timestamp, files, size, previous_files, previous_size in rows:
+        report.append({"repository": repository, "refreshed": timestamp, "files": files, "bytes": size,
+                       "files_growth": None if previous_files is None else files - previous_files,
+                       "bytes_growth": None if previous_size is None else size - previous_size})
+    return sorted(report, key=lambda entry: (entry["bytes_growth"] or 0, entry["bytes"]), reverse=True)
+
+
+def _signed_human(size):
+    if size is None:
+        return "n/a"
+    return ("-" if size < 0 else "+") + bytes_to_human(abs(size))
+
+
+def print_growth(host, days, report):
+    print("===== Nexus Inventory Report =====")
+    print(f"Nexus host : {host}")
+    print(f"Generated  : {time.strftime('%Y-%m-%d %H:%M:%S %Z')}")
+    print(f"Growth     : last {days} day(s)")
+    print()
+    total_bytes = sum(entry["bytes"] for entry in report)
+    print(f"Repositories: {len(report)}, total size: {bytes_to_human(total_bytes)} ({total_bytes} bytes)")
+    print()
+    print(f"{'Repository':<40} {'Size':>12} {'Growth':>13} {'Files':>10} {'New files':>10}  Refreshed")
+    for entry in report:
+        files_growth = "n/a" if entry["files_growth"] is None else f"{entry['files_growth']:+d}"
+        refreshed = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["refreshed"]))
+        print(f"{entry['repository']:<40} {bytes_to_human(entry['bytes']):>12} {_signed_human(entry['bytes_growth']):>13} "
+              f"{entry['files']:>10} {files_growth:>10}  {refreshed}")
+    print("===== End of Report =====")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persisted inventory of Nexus repository assets.")
+    parser.add_argument("--host", default=os.environ.get("NEXUS_HOST") or DEFAULT_NEXUS_HOST,
+                        help=f"Nexus host (default: NEXUS_HOST or {DEFAULT_NEXUS_HOST})")
+    parser.add_argument("--db", help="inventory database (default: ~/.cbi/nexus-inventory-<host>.sqlite)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    refresh_parser = subparsers.add_parser("refresh", help="reconcile the inventory with Nexus")
+    refresh_parser.add_argument("repositories", nargs="*", metavar="REPO", help="repositories to refresh")
+    refresh_parser.add_argument("--all", action="store_true", help="refresh all hosted repositories of the host")
+    refresh_parser.add_argument("--include-proxy", action="store_true", help="with --all, also refresh proxy repositories")
+    refresh_parser.add_argument("-j", "--jobs", type=int, default=_DEFAULT_JOBS,
+                                help=f"number of repositories refreshed concurrently (default: {_DEFAULT_JOBS})")
+
+    report_parser = subparsers.add_parser("report", help="print the size and growth of all repositories")
+    report_parser.add_argument("--days", type=float, default=_DEFAULT_DAYS, help=f"growth period (default: {_DEFAULT_DAYS})")
+    report_parser.add_argument("--json", action="store_true", help="print the report as JSON")
+
+    history_parser = subparsers.add_parser("history", help="print the size history of a repository")
+    history_parser.add_argument("repository", metavar="REPO")
+
+    size_parser = subparsers.add_parser("size", help="print the repo_size report of a repository from the inventory")
+    size_parser.add_argument("repository", metavar="REPO")
+    size_parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    db = connect(args.db or default_db(args.host))
+
+    if args.command == "refresh":
+        username = os.environ.get("NEXUS_TOKEN_USERNAME", "")
+        password = os.environ.get("NEXUS_TOKEN_PASSWORD", "")
+        if not username or not password:
+            print("[ERROR] Missing Nexus credentials.", file=sys.stderr)
+            print("[HINT] Set NEXUS_TOKEN_USERNAME and NEXUS_TOKEN_PASSWORD.", file=sys.stderr)
+            sys.exit(1)
+        nexus = Nexus(args.host, username, password, args.jobs)
+        repositories = list(args.repositories)
+        if args.all:
+            types = ("hosted", "proxy") if args.include_proxy else ("hosted",)
+            # group repositories only aggregate other repositories, they would be counted twice
+            repositories += sorted(repo["name"] for repo in nexus.repositories()
+                                   if repo.get("type") in types and repo["name"] not in repositories)
+        if not repositories:
+            print("[ERROR] No repository to refresh, give repositories or --all.", file=sys.stderr)
+            sys.exit(1)
+        if not refresh(db, nexus, repositories, args.jobs):
+            sys.exit(1)
+
+    elif args.command == "report":
+        report = growth(db, args.days)
+        if args.json:
+            print(json.dumps({"nexus_host": args.host, "days": args.days, "repositories": report}, indent=2))
+        else:
+            print_growth(args.host, args.days, report)
+
+    elif args.command == "history":
+        rows = db.execute("SELECT timestamp, files, bytes, added, changed, removed FROM repo_history "
+                          "WHERE repository = ? ORDER BY timestamp", (args.repository,)).fetchall()
+        if not rows:
+            print(f"[ERROR] Repository '{args.repository}' is not in the inventory.", file=sys.stderr)
+            sys.exit(1)
+        for timestamp, files, size, added, changed, removed in rows:
+            print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(timestamp))}  {bytes_to_human(size):>12}  "
+                  f"{files:>8} files  (+{added} added, {changed} changed, -{removed} removed)")
+
+    elif args.command == "size":
+        aggregate = Aggregate()
+        rows = db.execute("SELECT path, size FROM assets WHERE repository = ?", (args.repository,))
+        while True:
+            page = rows.fetchmany(1000)
+            if not page:
+                break
+            aggregate.add_items({"path": path, "fileSize": size} for path, size in page)
+        report = aggregate.report()
+        if args.json:
+            print(json.dumps(dict(report, repository=args.repository, nexus_host=args.host, api_calls=0), indent=2))
+        else:
+            print_report(args.repository, args.host, 0, report)
+
+
+if __name__ == "__main__":
+    main()
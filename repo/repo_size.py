@@ -0,0 +1,292 @@
+import argparse
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Nexus repository size report.
+#
+# Asset pages are streamed over one pooled HTTP session and aggregated as they arrive: sizes per directory and
+# extension are summed, the largest artifacts are kept in a bounded heap. The next page is fetched while the current
+# one is aggregated. With --partition, the repository is listed through the search API, one group (or path prefix)
+# per partition, and the partitions are walked concurrently.
+#
+# Usage:
+#   python repo_size.py [--debug] [--json] [--partition GROUP ...] [-j JOBS] <REPO> [NEXUS_HOST]
+#   python repo_size.py [--debug] [--json] [--partition GROUP ...] [-j JOBS] <REPO> <NEXUS_TOKEN_USERNAME> <NEXUS_TOKEN_PASSWORD> [NEXUS_HOST]
+# If credentials are not provided as args, fallback to:
+#   NEXUS_TOKEN_USERNAME and NEXUS_TOKEN_PASSWORD
+
+DEFAULT_NEXUS_HOST = "repo.eclipse.org"
+TOP_DIRS = 20
+TOP_FILES = 20
+TOP_EXTS = 10
+
+_DEFAULT_JOBS = 4
+_TIMEOUT = 60
+
+debug = False
+
+
+def debug_log(message):
+    if debug:
+        print("[DEBUG] " + message, file=sys.stderr)
+
+
+def bytes_to_human(size):
+    units = ["B", "KiB", "MiB", "GiB", "TiB", "PiB"]
+    value = float(size)
+    i = 0
+    while value >= 1024 and i < len(units) - 1:
+        value /= 1024
+        i += 1
+    if i == 0:
+        return f"{int(value)} {units[i]}"
+    return f"{value:.2f} {units[i]}"
+
+
+def _extension(path):
+    name = path.rsplit("/", 1)[-1]
+    if "." not in name:
+        return "(no_ext)"
+    return name.rsplit(".", 1)[-1].lower()
+
+
+class Aggregate:
+    def __init__(self, top_files=TOP_FILES):
+        self.top_files = top_files
+        self.total_bytes = 0
+        self.total_files = 0
+        self.paths = set()
+        self.dirs = {}
+        self.exts = {}
+        # min-heap of the largest files, (size, path)
+        self.largest = []
+        self.lock = threading.Lock()
+
+    def add_items(self, items):
+        with self.lock:
+            for item in items:
+                path, size = item.get("path"), item.get("fileSize")
+                if path is None or size is None:
+                    continue
+                path, size = path.lstrip("/"), int(size)
+                # like repo_size.sh, every listed asset is counted in the totals, directories and extensions,
+                # only the unique paths and the largest files are per path
+                self.total_bytes += size
+                self.total_files += 1
+
+                parts = path.split("/")
+                key = ""
+                for part in parts[:-1]:
+                    key += "/" + part
+                    self.dirs[key] = self.dirs.get(key, 0) + size
+
+                ext = self.exts.setdefault(_extension(path), [0, 0])
+                ext[0] += size
+                ext[1] += 1
+
+                if path in self.paths:
+                    continue
+                self.paths.add(path)
+                if len(self.largest) < self.top_files:
+                    heapq.heappush(self.largest, (size, path))
+                elif size > self.largest[0][0]:
+                    heapq.heapreplace(self.largest, (size, path))
+
+    def report(self):
+        return {
+            "total_files": self.total_files,
+            "unique_paths": len(self.paths),
+            "total_bytes": self.total_bytes,
+            "top_directories": [{"path": path, "bytes": size}
+                                for path, size in heapq.nlargest(TOP_DIRS, self.dirs.items(), key=lambda item: item[1])],
+            "top_artifacts": [{"path": path, "bytes": size}
+                              for size, path in sorted(self.largest, reverse=True)],
+            "top_extensions": [{"extension": ext, "bytes": size, "files": count}
+                               for ext, (size, count) in heapq.nlargest(TOP_EXTS, self.exts.items(), key=lambda item: item[1][0])],
+        }
+
+
+class Nexus:
+    def __init__(self, host, username, password, jobs):
+        import requests
+        from requests.adapters import HTTPAdapter, Retry
+        self.base_url = "https://" + host
+        self.session = requests.Session()
+        self.session.auth = (username, password)
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max(1, jobs), max_retries=retries))
+        self.api_calls = 0
+        self.lock = threading.Lock()
+
+    def get(self, path, params=None, auth=True):
+        with self.lock:
+            self.api_calls += 1
+        return self.session.get(self.base_url + path, params=params, timeout=_TIMEOUT,
+                                auth=None if auth else False)
+
+    def test_credentials(self, repo):
+        import requests
+        # 1) Reachability probe (no auth)
+        try:
+            self.get("/service/rest/v1/status", auth=False)
+        except requests.ConnectionError:
+            print(f"[ERROR] Nexus host unreachable: {self.base_url[8:]}", file=sys.stderr)
+            sys.exit(2)
+
+        # 2) Auth probe
+        status = self.get("/service/rest/v1/repositories").status_code
+        if status != 200:
+            print(f"[ERROR] Authentication failed on {self.base_url}/service/rest/v1/repositories (HTTP {status}).", file=sys.stderr)
+            sys.exit(2)
+
+        # 3) Repository-level access probe
+        status = self.get("/service/rest/v1/assets", params={"repository": repo}).status_code
+        if status == 403:
+            print(f"[ERROR] Authenticated but forbidden to read repository '{repo}' (HTTP 403).", file=sys.stderr)
+            sys.exit(2)
+        if status == 404:
+            print(f"[ERROR] Repository '{repo}' not found (HTTP 404).", file=sys.stderr)
+            sys.exit(2)
+        debug_log(f"Repo probe       : {self.base_url}/service/rest/v1/assets?repository={repo} => {status}")
+
+    def repositories(self):
+        response = self.get("/service/rest/v1/repositories")
+        if response.status_code != 200:
+            print(f"[ERROR] Authentication failed on {self.base_url}/service/rest/v1/repositories (HTTP {response.status_code}).",
+                  file=sys.stderr)
+            sys.exit(2)
+        return response.json()
+
+    def _page(self, path, params, label, page):
+        debug_log(f"Fetching {label} page={page}")
+        response = self.get(path, params)
+        response.raise_for_status()
+        try:
+            return response.json()
+        except ValueError:
+            print(f"[ERROR] Invalid JSON response from Nexus ({label} page {page}).", file=sys.stderr)
+            sys.exit(3)
+
+    def walk(self, path, params, aggregate, label="assets"):
+        # follows the continuation tokens, the next page is requested before the current one is aggregated
+        with ThreadPoolExecutor(max_workers=1) as prefetch:
+            page = 1
+            data = self._page(path, params, label, page)
+            while True:
+                token = data.get("continuationToken")
+                next_data = None
+                if token:
+                    next_data = prefetch.submit(self._page, path, dict(params, continuationToken=token), label, page + 1)
+                items = data.get("items") or []
+                aggregate.add_items(items)
+                debug_log(f"Progress: {label} page={page} page_items={len(items)} has_next_token={'yes' if token else 'no'} api_calls={self.api_calls}")
+                if next_data is None:
+                    return page
+                data = next_data.result()
+                page += 1
+
+
+def collect(nexus, repo, partitions, jobs):
+    aggregate = Aggregate()
+    if not partitions:
+        print(f"[INFO] Fetching assets from Nexus repository '{repo}' on '{nexus.base_url[8:]}'...", file=sys.stderr)
+        pages = nexus.walk("/service/rest/v1/assets", {"repository": repo}, aggregate)
+        debug_log(f"Fetch completed: pages={pages} total_items={aggregate.total_files} api_calls={nexus.api_calls}")
+        return aggregate
+
+    print(f"[INFO] Fetching assets from Nexus repository '{repo}' on '{nexus.base_url[8:]}' in {len(partitions)} partition(s)...",
+          file=sys.stderr)
+
+    def walk_partition(partition):
+        # Maven group ids are matched on the group, path prefixes (containing a "/") on the asset name
+        if "/" in partition:
+            params = {"repository": repo, "name": partition.strip("/") + "/*"}
+        else:
+            params = {"repository": repo, "group": partition}
+        return nexus.walk("/service/rest/v1/search/assets", params, aggregate, label=partition)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        pages = sum(executor.map(walk_partition, partitions))
+    debug_log(f"Fetch completed: pages={pages} total_items={aggregate.total_files} api_calls={nexus.api_calls}")
+    return aggregate
+
+
+def print_report(repo, host, api_calls, report):
+    print("===== Repository Size Report =====")
+    print(f"Repository : {repo}")
+    print(f"Nexus host : {host}")
+    print(f"Generated  : {time.strftime('%Y-%m-%d %H:%M:%S %Z')}")
+    print()
+    print("Global summary")
+    print(f"- API calls           : {api_calls}")
+    print(f"- Total files         : {report['total_files']}")
+    print(f"- Unique asset paths  : {report['unique_paths']}")
+    print(f"- Total size          : {bytes_to_human(report['total_bytes'])} ({report['total_bytes']} bytes)")
+    print()
+    print(f"Top {TOP_DIRS} directories by size")
+    for entry in report["top_directories"]:
+        print(f"- {bytes_to_human(entry['bytes']):<12} {entry['path']}")
+    print()
+    print(f"Top {TOP_FILES} artifacts by size")
+    for entry in report["top_artifacts"]:
+        print(f"- {bytes_to_human(entry['bytes']):<12} {entry['path']}")
+    print()
+    print(f"Top {TOP_EXTS} extensions by total size")
+    for entry in report["top_extensions"]:
+        print(f"- {entry['extension']:<8} {bytes_to_human(entry['bytes']):<12} {entry['files']} files")
+    print("===== End of Report =====")
+
+
+def main():
+    global debug
+    parser = argparse.ArgumentParser(description="Nexus repository size report.")
+    parser.add_argument("args", nargs="+", metavar="ARG",
+                        help="<REPO> [NEXUS_HOST] or <REPO> <NEXUS_TOKEN_USERNAME> <NEXUS_TOKEN_PASSWORD> [NEXUS_HOST]")
+    parser.add_argument("-d", "--debug", action="store_true", help="debug mode (or DEBUG=1)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--partition", action="append", default=[],
+                        help="list the repository through the search API, one partition per Maven group (e.g. org.eclipse.jetty) "
+                             "or path prefix (e.g. org/eclipse/jetty/), can be given several times")
+    parser.add_argument("-j", "--jobs", type=int, default=_DEFAULT_JOBS,
+                        help=f"number of partitions walked concurrently (default: {_DEFAULT_JOBS})")
+    args = parser.parse_args()
+    debug = args.debug or os.environ.get("DEBUG", "0") == "1"
+
+    if len(args.args) > 4:
+        parser.print_usage(sys.stderr)
+        sys.exit(1)
+    repo = args.args[0]
+    host = os.environ.get("NEXUS_HOST") or DEFAULT_NEXUS_HOST
+    username = os.environ.get("NEXUS_TOKEN_USERNAME", "")
+    password = os.environ.get("NEXUS_TOKEN_PASSWORD", "")
+    if len(args.args) == 2:
+        host = args.args[1]
+    elif len(args.args) >= 3:
+        username, password = args.args[1], args.args[2]
+        if len(args.args) == 4:
+            host = args.args[3]
+
+    if not username or not password:
+        print("[ERROR] Missing Nexus credentials.", file=sys.stderr)
+        print("[HINT] Pass credentials as arguments, or set NEXUS_TOKEN_USERNAME and NEXUS_TOKEN_PASSWORD.", file=sys.stderr)
+        parser.print_usage(sys.stderr)
+        sys.exit(1)
+
+    nexus = Nexus(host, username, password, args.jobs)
+    nexus.test_credentials(repo)
+    report = collect(nexus, repo, args.partition, args.jobs).report()
+
+    if args.json:
+        print(json.dumps(dict(report, repository=repo, nexus_host=host, api_calls=nexus.api_calls,
+                              partitions=args.partition), indent=2))
+    else:
+        print_report(repo, host, nexus.api_calls, report)
+
+
+if __name__ == "__main__":
+    main()
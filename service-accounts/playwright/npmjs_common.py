@@ -1,61 +1,39 @@
 import os
-import subprocess
-import json
+import sys
+
+# make the shared ciadmin package importable when the scripts are run from this folder
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")))
+
+from ciadmin import cli, sites, tracing
 
 SITE = "npmjs.com"
 LOGIN_PAGE = "https://" + SITE + "/login"
 REGISTER_PAGE = "https://" + SITE + "/signup"
 
-config_path = os.path.expanduser('~/.cbi/config')
-with open(config_path, 'r') as config_file:
-    config = json.load(config_file)
-
-password_store_dir = config.get('password-store', {}).get('cbi-dir')
-if password_store_dir:
-    os.environ['PASSWORD_STORE_DIR'] = password_store_dir
-
-
-def get_pass_2fa_otp(project_name):
-    return os.popen("oathtool --totp -b $(pass bots/" + project_name + "/" + SITE + "/2FA-seed)").read()
-
-
-def get_pass_creds(project_name, item):
-    return os.popen("pass bots/" + project_name + "/" + SITE + "/" + item).read()
-
-
-def add_to_pass(project_name, item, item_name):
-    subprocess.check_output("echo \"" + item + "\" | pass insert -m bots/" + project_name + "/" + SITE + "/" + item_name, shell=True)
-
-
-def get_project_shortname(project_name):
-    # TODO: can this be simplified?
-    if project_name.find("."):
-        short_name = "".join(project_name.split(".")[-1:])
-    else:
-        short_name = "".join(project_name)
-    return short_name
+# hosts (and their subdomains) that are not blocked in fast mode
+ALLOWED_HOSTS = ["npmjs.com", "npmjs.org"]
+BLOCKED_HOSTS = []
 
+driver = sites.register(sites.Driver(SITE, ALLOWED_HOSTS, BLOCKED_HOSTS))
 
-def ask_to_continue(message="Do you want to continue? (yes/no): "):
-    while True:
-        user_input = input(message).strip().lower()
-        if user_input in ['yes', 'y']:
-            print("Continuing...")
-            return True
-        elif user_input in ['no', 'n']:
-            print("Exiting...")
-            return False
-        else:
-            print("Please enter 'yes' or 'no'.")
+get_pass_creds = driver.get_pass_creds
+add_to_pass = driver.add_to_pass
+get_totp = driver.get_totp
+get_pass_2fa_otp = driver.get_pass_2fa_otp
+get_project_shortname = cli.get_project_shortname
+ask_to_continue = cli.ask_to_continue
 
 
+@tracing.traced
 def signout(page):
     page.get_by_label("Profile menu").click()
     page.get_by_role("link", name="Sign Out").click()
 
 
+@tracing.traced
 def login(page, project_name, username, password):
-    response = page.goto(LOGIN_PAGE)
+    with tracing.span("login page"):
+        response = page.goto(LOGIN_PAGE)
 
     assert response is not None
     if not response.ok:
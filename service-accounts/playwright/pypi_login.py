@@ -1,40 +1,39 @@
-import sys
 import pypi_common as common
+from ciadmin import cli, launcher, tracing
 
 from playwright.sync_api import sync_playwright, expect
 
 
-def main():
-    _DEFAULT_TIMEOUT = 10000
+_DEFAULT_TIMEOUT = 10000
 
-    if len(sys.argv) < 2:
-        print("ERROR: project name must be set")
-        sys.exit(1)
-    else:
-        project_name = sys.argv[1]
-        print("Project name: " + project_name)
 
-    print("opening browser window")
-    with sync_playwright() as playwright:
-        browser = playwright.firefox.launch(headless=False)
-        context = browser.new_context(no_viewport=True)
+@tracing.traced
+def run(browser, project_name, fast):
+    context = common.driver.new_context(browser, fast)
+
+    page = context.new_page()
+    page.set_default_timeout(_DEFAULT_TIMEOUT)
+
+    username = common.get_pass_creds(project_name, "username")
+    password = common.get_pass_creds(project_name, "password")
 
-        page = context.new_page()
-        page.set_default_timeout(_DEFAULT_TIMEOUT)
+    common.login(page, project_name, username, password)
 
-        username = common.get_pass_creds(project_name, "username")
-        password = common.get_pass_creds(project_name, "password")
+    #expect(page.get_by_role("heading", name="Home", exact=True)).to_be_visible(timeout=30000)
 
-        common.login(page, project_name, username, password)
+    input('Press any key to continue\n')
+    common.signout(page)
 
-        #expect(page.get_by_role("heading", name="Home", exact=True)).to_be_visible(timeout=30000)
+    page.close()
+    context.close()
 
-        input('Press any key to continue\n')
-        common.signout(page)
 
-        page.close()
-        context.close()
-        browser.close()
+def main():
+    project_name, fast = cli.parse_project_args()
+
+    print("opening browser window")
+    with sync_playwright() as playwright:
+        launcher.run(playwright, lambda browser, fast: run(browser, project_name, fast), fast)
 
 
 if __name__ == "__main__":
@@ -35,6 +35,9 @@ cat <<EOF
   "password-store": {
     "cbi-dir": "/path/to/password-store-cbi"
   }
+  "playwright": {
+    "session-ttl": 28800
+  }
 }
 EOF
 }
@@ -58,6 +61,7 @@ help() {
   printf "Available commands:\n"
   printf "Command\t\t\tDescription\n\n"
   printf "get_var\t\tGet variable from local config.\n"
+  printf "export_vars\tPrint all variables of the local config as shell exports (eval \"\$(local_config.sh export_vars)\").\n"
   exit 0
 }
 
@@ -78,6 +82,15 @@ get_var() {
     exit 1
   fi
 
+  # values exported by 'export' (e.g. by ci-adm, known entries that are not secrets) are used without reading the file again
+  local var_name="${group:+${group}_}${name}"
+  var_name="${var_name//[^a-zA-Z0-9]/_}"
+  var_name="CBI_CONFIG_${var_name^^}"
+  if [[ -n "${!var_name:-}" ]]; then
+    echo "${!var_name}"
+    return 0
+  fi
+
   if [[ -z "${group}" ]] || [[ "${group}" == "" ]]; then
     lcv="$(jq -r ".\"${name}\"" "${LOCAL_CONFIG}")"
     _check_if_var_exists "${lcv}" "${name}"
@@ -88,6 +101,11 @@ get_var() {
   echo "${lcv}"
 }
 
+# all values in one call, see ciadmin/config.py
+export_vars() {
+  python3 "$(dirname "$(readlink -f "${BASH_SOURCE[0]}")")/../ciadmin/config.py" export
+}
+
 "$@"
 
 # show help menu, if no first parameter is given